@@ -0,0 +1,352 @@
+import json
+import os
+import time
+from datetime import datetime, timezone
+import numpy as np
+
+# Chunked IQ capture files with SigMF-style metadata.
+#
+# A recording called <base> is stored as
+#   <base>.sigmf-meta         JSON: sample rate, centre frequency, datatype,
+#                             scale, chunk list and pulse count
+#   <base>.NNNN.sigmf-data    samples, in chunks of at most chunk_samples
+#   <base>.sigmf-pulses       little-endian int64 start sample of every pulse
+#
+# The pulse index is append-only and memory-mapped by the reader, so pulse N
+# is found without scanning the samples. Samples are stored as complex
+# float32 ("cf32_le"), or quantized to interleaved int16 ("ci16_le", half the
+# size) or int8 ("ci8", a quarter) after scaling by full_scale.
+
+META_SUFFIX = ".sigmf-meta"
+PULSE_SUFFIX = ".sigmf-pulses"
+SIGMF_VERSION = "1.0.0"
+
+# SigMF datatype -> (storage dtype of one I or Q value, largest code)
+DATATYPES = {
+    "cf32_le": (np.dtype("<f4"), None),
+    "ci16_le": (np.dtype("<i2"), 32767),
+    "ci8": (np.dtype("i1"), 127),
+}
+
+
+def chunk_path(base_path, index):
+    return f"{base_path}.{index:04d}.sigmf-data"
+
+
+def quantize(samples, datatype, full_scale=1.0):
+    """Interleaved I/Q values of ``samples`` in the storage type; returns (values, clipped count)."""
+    storage, limit = DATATYPES[datatype]
+    iq = np.asarray(samples, dtype=np.complex64).view(np.float32)
+    if limit is None:
+        return iq, 0
+    scaled = iq * np.float32(limit / full_scale)
+    np.rint(scaled, out=scaled)
+    clipped = int(np.count_nonzero((scaled > limit) | (scaled < -limit)))
+    np.clip(scaled, -limit, limit, out=scaled)
+    return scaled.astype(storage), clipped
+
+
+def dequantize(values, datatype, full_scale=1.0):
+    """complex64 samples from interleaved stored values."""
+    _, limit = DATATYPES[datatype]
+    if limit is None:
+        return np.asarray(values, dtype=np.float32).view(np.complex64)
+    iq = values.astype(np.float32)
+    iq *= np.float32(full_scale / limit)
+    return iq.view(np.complex64)
+
+
+class CaptureRecorder:
+    """Write a chunked capture with a sidecar metadata file and a pulse index.
+
+    ``pulse_period`` (in samples) indexes pulses automatically at
+    ``pulse_offset + k * pulse_period``, which fits the looped chirp + null;
+    otherwise call ``mark_pulse`` as pulses are recognised. The metadata file
+    is rewritten whenever a chunk is completed and on ``close``, so a
+    recording interrupted mid-way is still readable up to the last full chunk.
+
+    ``opener(path, nbytes)`` opens each chunk file; the default is a plain
+    buffered file, and ``captureWriter.open_writer`` gives preallocated chunks
+    flushed from a background thread. The opened writer must not drop data:
+    ``write`` raises ``OSError`` if a chunk accepts fewer bytes than given.
+    """
+
+    def __init__(self, base_path, sample_rate, center_freq=None, datatype="cf32_le", full_scale=1.0,
+                 chunk_samples=1 << 26, pulse_period=None, pulse_offset=0, description=None, opener=None):
+        if datatype not in DATATYPES:
+            raise ValueError(f"datatype must be one of {sorted(DATATYPES)}")
+        self.base_path = base_path
+        self.sample_rate = sample_rate
+        self.center_freq = center_freq
+        self.datatype = datatype
+        self.full_scale = full_scale
+        self.chunk_samples = chunk_samples
+        self.pulse_period = pulse_period
+        self.pulse_offset = pulse_offset
+        self.description = description
+        self.opener = opener or (lambda path, nbytes: open(path, "wb"))
+        self.chunk_stats = []     # stats() of each closed chunk writer that has them
+        self.created = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+        self.samples = 0          # samples written so far
+        self.pulses = 0
+        self.clipped_values = 0   # I or Q values saturated by quantization
+        self._chunks = []         # completed chunks: [file name, sample_start, sample_count]
+        self._chunk = None
+        self._chunk_start = 0
+        self._next_pulse = pulse_offset
+        self._pulse_file = open(base_path + PULSE_SUFFIX, "wb")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _open_chunk(self):
+        self._chunk_start = self.samples
+        nbytes = self.chunk_samples * 2 * DATATYPES[self.datatype][0].itemsize
+        self._chunk = self.opener(chunk_path(self.base_path, len(self._chunks)), nbytes)
+
+    def _close_chunk(self):
+        self._chunk.close()
+        if hasattr(self._chunk, "stats"):
+            self.chunk_stats.append(self._chunk.stats())
+        name = os.path.basename(chunk_path(self.base_path, len(self._chunks)))
+        self._chunks.append([name, self._chunk_start, self.samples - self._chunk_start])
+        self._chunk = None
+
+    def mark_pulse(self, sample_index=None):
+        """Index a pulse starting at ``sample_index`` (default: the next sample to be written)."""
+        start = self.samples if sample_index is None else sample_index
+        self._pulse_file.write(np.int64(start).astype("<i8").tobytes())
+        self.pulses += 1
+
+    def _mark_periodic(self, end):
+        if self._next_pulse >= end:
+            return
+        starts = np.arange(self._next_pulse, end, self.pulse_period, dtype="<i8")
+        self._pulse_file.write(starts.tobytes())
+        self.pulses += len(starts)
+        self._next_pulse = int(starts[-1]) + self.pulse_period
+
+    def write(self, samples):
+        samples = np.asarray(samples, dtype=np.complex64)
+        written = 0
+        while written < len(samples):
+            if self._chunk is None:
+                self._open_chunk()
+            room = self.chunk_samples - (self.samples - self._chunk_start)
+            part = samples[written:written + room]
+            values, clipped = quantize(part, self.datatype, self.full_scale)
+            self.clipped_values += clipped
+            data = memoryview(np.ascontiguousarray(values)).cast("B")
+            accepted = self._chunk.write(data)
+            if accepted is not None and accepted != len(data):
+                # The metadata and pulse index count every sample, so a lossy writer would corrupt them
+                raise OSError(f"chunk writer accepted {accepted} of {len(data)} bytes; "
+                              "open it so that it waits for the disk (captureWriter block=True)")
+            written += len(part)
+            self.samples += len(part)
+            if self.pulse_period:
+                # Index only pulses whose first sample is on its way to disk
+                self._mark_periodic(self.samples)
+            if self.samples - self._chunk_start == self.chunk_samples:
+                self._close_chunk()
+                self.write_metadata()
+        return written
+
+    def write_pulse(self, samples):
+        self.mark_pulse()
+        return self.write(samples)
+
+    def metadata(self):
+        chunks = list(self._chunks)
+        if self._chunk is not None:
+            chunks.append([os.path.basename(chunk_path(self.base_path, len(self._chunks))),
+                           self._chunk_start, self.samples - self._chunk_start])
+        capture = {"core:sample_start": 0, "core:datetime": self.created}
+        if self.center_freq is not None:
+            capture["core:frequency"] = self.center_freq
+        meta = {
+            "global": {
+                "core:datatype": self.datatype,
+                "core:sample_rate": self.sample_rate,
+                "core:version": SIGMF_VERSION,
+                "core:recorder": "UDP Test/captureFormat.py",
+                "capture:full_scale": self.full_scale,
+                "capture:sample_count": self.samples,
+                "capture:chunks": [{"file": name, "sample_start": start, "sample_count": count}
+                                   for name, start, count in chunks],
+                "capture:pulse_index": os.path.basename(self.base_path + PULSE_SUFFIX),
+                "capture:pulse_count": self.pulses,
+                "capture:clipped_values": self.clipped_values,
+            },
+            "captures": [capture],
+            "annotations": [],
+        }
+        if self.description:
+            meta["global"]["core:description"] = self.description
+        if self.pulse_period:
+            meta["global"]["capture:pulse_period"] = self.pulse_period
+        return meta
+
+    def write_metadata(self):
+        self._pulse_file.flush()
+        # Write beside the old file and swap, so readers never see half a document
+        temp = self.base_path + META_SUFFIX + ".tmp"
+        with open(temp, "w") as f:
+            json.dump(self.metadata(), f, indent=2)
+        os.replace(temp, self.base_path + META_SUFFIX)
+
+    def close(self):
+        if self._pulse_file.closed:
+            return
+        if self._chunk is not None:
+            self._close_chunk()
+        self.write_metadata()
+        self._pulse_file.close()
+
+
+class CaptureFile:
+    """Read a capture written by ``CaptureRecorder``.
+
+    Chunks and the pulse index are memory-mapped; ``read`` and ``pulse`` copy
+    out (and dequantize) only the requested samples.
+    """
+
+    def __init__(self, base_path):
+        if base_path.endswith(META_SUFFIX):
+            base_path = base_path[:-len(META_SUFFIX)]
+        self.base_path = base_path
+        with open(base_path + META_SUFFIX) as f:
+            self.meta = json.load(f)
+        info = self.meta["global"]
+        self.datatype = info["core:datatype"]
+        self.sample_rate = info["core:sample_rate"]
+        self.center_freq = self.meta["captures"][0].get("core:frequency") if self.meta["captures"] else None
+        self.full_scale = info.get("capture:full_scale", 1.0)
+        storage, _ = DATATYPES[self.datatype]
+
+        folder = os.path.dirname(base_path)
+        self._chunks = []
+        for chunk in info["capture:chunks"]:
+            count = chunk["sample_count"]
+            data = (np.memmap(os.path.join(folder, chunk["file"]), dtype=storage, mode="r", shape=(2 * count,))
+                    if count else np.zeros(0, dtype=storage))
+            self._chunks.append(data)
+        self._starts = np.array([c["sample_start"] for c in info["capture:chunks"]], dtype=np.int64)
+        self.sample_count = info["capture:sample_count"]
+
+        pulses = info.get("capture:pulse_count", 0)
+        index_path = os.path.join(folder, info.get("capture:pulse_index", ""))
+        self.pulse_starts = (np.memmap(index_path, dtype="<i8", mode="r", shape=(pulses,))
+                             if pulses else np.zeros(0, dtype=np.int64))
+
+    def __len__(self):
+        return self.sample_count
+
+    @property
+    def pulse_count(self):
+        return len(self.pulse_starts)
+
+    def read(self, start=None, stop=None):
+        """complex64 copy of samples ``[start:stop]``, across chunk boundaries."""
+        start = 0 if start is None else max(0, start)
+        stop = self.sample_count if stop is None else min(stop, self.sample_count)
+        out = np.zeros(max(0, stop - start), dtype=np.complex64)
+        if len(out) == 0:
+            return out
+        first = int(np.searchsorted(self._starts, start, side="right")) - 1
+        for k in range(first, len(self._chunks)):
+            chunk_start = int(self._starts[k])
+            if chunk_start >= stop:
+                break
+            lo, hi = max(start, chunk_start), min(stop, chunk_start + len(self._chunks[k]) // 2)
+            values = self._chunks[k][2 * (lo - chunk_start):2 * (hi - chunk_start)]
+            out[lo - start:hi - start] = dequantize(values, self.datatype, self.full_scale)
+        return out
+
+    def pulse(self, n, length=None):
+        """Samples of pulse ``n``: up to the next pulse start, or ``length`` samples."""
+        start = int(self.pulse_starts[n])
+        if length is not None:
+            stop = start + length
+        elif n + 1 < len(self.pulse_starts):
+            stop = int(self.pulse_starts[n + 1])
+        else:
+            stop = self.sample_count
+        return self.read(start, stop)
+
+    def pulses(self, first=0, count=None, length=None):
+        """A (pulses x length) matrix of consecutive pulses, ready for range compression."""
+        count = len(self.pulse_starts) - first if count is None else count
+        if length is None:
+            length = int(np.diff(self.pulse_starts[first:first + count + 1]).min()) if count > 1 else \
+                self.sample_count - int(self.pulse_starts[first])
+        return np.stack([self.pulse(first + k, length) for k in range(count)])
+
+
+def record_stream(pipeline, recorder, seconds=None, timeout=1.0):
+    """Write blocks from an ``IngestPipeline`` to ``recorder`` for ``seconds`` (or until interrupted).
+
+    The pipeline must be opened with ``overflow="raise"``: a queue that drops
+    blocks would leave holes the capture has no way to record. If the
+    recorder falls behind, the queued blocks are still written and the
+    pipeline's ``OverflowError`` is raised, so the capture ends cleanly at
+    the last sample received before the overflow.
+    """
+    if pipeline.overflow != "raise":
+        raise ValueError("record_stream needs an IngestPipeline opened with overflow='raise'")
+    deadline = None if seconds is None else time.monotonic() + seconds
+    try:
+        while deadline is None or time.monotonic() < deadline:
+            block = pipeline.get(timeout=timeout)
+            if block is not None:
+                recorder.write(block)
+            elif pipeline.error is not None:
+                raise pipeline.error
+    except KeyboardInterrupt:
+        pass
+    return recorder.samples
+
+
+if __name__ == "__main__":
+    import argparse
+    from captureWriter import open_writer
+    from ingestPipeline import IngestPipeline
+    from iqReceiver import open_receiver
+
+    parser = argparse.ArgumentParser(description="Record the framed UDP IQ stream to a chunked capture.")
+    parser.add_argument("base_path", help="recording name, e.g. captures/run1")
+    parser.add_argument("--ip", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--packet-size", type=int, default=1472)
+    parser.add_argument("--seconds", type=float, default=None)
+    parser.add_argument("--fs", type=float, required=True, help="sample rate of the stream")
+    parser.add_argument("--center-freq", type=float, default=None)
+    parser.add_argument("--datatype", choices=sorted(DATATYPES), default="cf32_le")
+    parser.add_argument("--full-scale", type=float, default=1.0, help="amplitude mapped to the largest code")
+    parser.add_argument("--pulse-period", type=int, default=None, help="samples between pulse starts")
+    parser.add_argument("--queue-blocks", type=int, default=256,
+                        help="received blocks buffered while the disk catches up")
+    args = parser.parse_args()
+
+    receiver = open_receiver(args.ip, args.port, packet_size=args.packet_size, framed=True)
+    # The disk writer waits for a free buffer rather than discard samples, and
+    # the ingest queue absorbs the stall; if it fills, recording stops instead
+    # of silently skipping blocks
+    pipeline = IngestPipeline(receiver, max_blocks=args.queue_blocks, overflow="raise").start()
+    with CaptureRecorder(args.base_path, args.fs, args.center_freq, args.datatype, args.full_scale,
+                         pulse_period=args.pulse_period, opener=open_writer) as recorder:
+        try:
+            record_stream(pipeline, recorder, args.seconds)
+        except OverflowError as e:
+            print(f"Recording stopped early: {e}")
+    pipeline.stop()
+    print(f"Recorded {recorder.samples} samples and {recorder.pulses} pulses "
+          f"({recorder.clipped_values} clipped values); stream stats: {pipeline.stats()}")
+    if recorder.chunk_stats:
+        worst = max(s["write_latency_max_ms"] for s in recorder.chunk_stats)
+        backlog = max(s["max_backlog_buffers"] for s in recorder.chunk_stats)
+        print(f"Disk: worst write {worst:.1f} ms, deepest backlog {backlog} buffers")
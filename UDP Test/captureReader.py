@@ -0,0 +1,78 @@
+import numpy as np
+import dspCache
+
+
+class CaptureReader:
+    """Memory-mapped access to a headerless IQ capture such as ``gnuFileDump/gnuIQRx.exe``.
+
+    Nothing is read when the reader is created; slicing touches only the pages
+    behind the requested samples, so multi-GB captures can be inspected
+    without loading them.
+    """
+
+    def __init__(self, file_path, dtype=np.complex64, offset=0):
+        self.file_path = file_path
+        self.dtype = np.dtype(dtype)
+        self.data = np.memmap(file_path, dtype=self.dtype, mode="r", offset=offset)
+
+    def __len__(self):
+        return len(self.data)
+
+    def _bounds(self, start, stop):
+        start = 0 if start is None else max(0, start)
+        stop = len(self.data) if stop is None else min(stop, len(self.data))
+        return start, max(start, stop)
+
+    def window(self, start=None, stop=None, step=1):
+        """Return a lazy memmap view of ``[start:stop:step]``; pages load as it is used."""
+        start, stop = self._bounds(start, stop)
+        return self.data[start:stop:step]
+
+    def read(self, start=None, stop=None, step=1):
+        """Copy ``[start:stop:step]`` into memory, reading only that range."""
+        return np.array(self.window(start, stop, step))
+
+    def window_by_time(self, fs, start_time, stop_time, step=1):
+        return self.read(int(start_time * fs), int(stop_time * fs), step)
+
+    def chunks(self, chunk_size=1 << 20, start=None, stop=None, overlap=0):
+        """Yield ``(offset, view)`` pairs covering the range in bounded memory.
+
+        Consecutive chunks share ``overlap`` samples, which filters and FFTs
+        that need history across chunk boundaries can use.
+        """
+        if overlap >= chunk_size:
+            raise ValueError("overlap must be smaller than chunk_size")
+        start, stop = self._bounds(start, stop)
+        hop = chunk_size - overlap
+        for offset in range(start, stop, hop):
+            yield offset, self.data[offset:min(offset + chunk_size, stop)]
+            if offset + chunk_size >= stop:
+                break
+
+    def average_spectrum(self, fft_size=1024, start=None, stop=None, window="hann", batch=256):
+        """Averaged power spectrum (Welch, no overlap) of a range, fftshifted, in dB.
+
+        Frames are reshaped views of the memmap, transformed ``batch`` at a
+        time with the shared FFT plans and window.
+        """
+        start, stop = self._bounds(start, stop)
+        frames = (stop - start) // fft_size
+        if frames == 0:
+            raise ValueError("range is shorter than fft_size")
+        taper = dspCache.window(window, fft_size)
+        view = self.data[start:start + frames * fft_size].reshape(frames, fft_size)
+        total = np.zeros(fft_size)
+        for k in range(0, frames, batch):
+            spectra = dspCache.fft(view[k:k + batch] * taper)
+            total += (spectra.real ** 2 + spectra.imag ** 2).sum(axis=0)
+        power = total / (frames * float(np.sum(taper ** 2)))
+        return np.fft.fftshift(10 * np.log10(np.maximum(power, 1e-20)))
+
+    def peak_magnitude(self, chunk_size=1 << 20):
+        # Full-file scan, one chunk in memory at a time
+        peak = 0.0
+        for _, chunk in self.chunks(chunk_size):
+            if len(chunk):
+                peak = max(peak, float(np.abs(chunk).max()))
+        return peak
@@ -0,0 +1,226 @@
+import mmap
+import os
+import queue
+import threading
+import time
+import numpy as np
+
+# Capture-to-disk without stalling the receive loop. Incoming blocks are
+# copied into one of a few large page-aligned buffers; a full buffer is handed
+# to a background thread that writes it with a single system call while the
+# receive side fills the next one. The file is preallocated up front so the
+# filesystem is not extending it on every write.
+
+ALIGNMENT = mmap.PAGESIZE
+
+
+class CaptureWriter:
+    """Buffered, background-flushed writer for one capture file.
+
+    ``write`` only copies into the current buffer, so it costs a memcpy. If
+    the disk falls so far behind that all ``buffers`` are waiting to be
+    written, ``write`` either waits for one (``block=True``) or discards the
+    data and counts it in ``overrun_bytes`` so the socket is never stalled.
+
+    ``direct=True`` opens the file with ``O_DIRECT`` (Linux) to bypass the
+    page cache; buffers are page-aligned and the final partial buffer is
+    padded, then the file is truncated back to the bytes actually written.
+    ``stats()`` reports throughput, write latency and backlog.
+    """
+
+    def __init__(self, path, buffer_bytes=16 << 20, buffers=4, preallocate=0, direct=False, block=False,
+                 history=4096):
+        if buffer_bytes % ALIGNMENT:
+            raise ValueError(f"buffer_bytes must be a multiple of {ALIGNMENT}")
+        self.path = path
+        self.buffer_bytes = buffer_bytes
+        self.block = block
+
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+        self.direct = direct and hasattr(os, "O_DIRECT")
+        if self.direct:
+            flags |= os.O_DIRECT
+        self._fd = os.open(path, flags, 0o644)
+        if preallocate:
+            if hasattr(os, "posix_fallocate"):
+                os.posix_fallocate(self._fd, 0, preallocate)
+            else:
+                os.ftruncate(self._fd, preallocate)
+
+        # Anonymous maps are page-aligned, which O_DIRECT requires
+        self._buffers = [mmap.mmap(-1, buffer_bytes) for _ in range(buffers)]
+        self._free = queue.Queue()
+        for buffer in self._buffers:
+            self._free.put(buffer)
+        self._full = queue.Queue()
+        self._current = self._free.get()
+        self._fill = 0
+
+        self.bytes_in = 0          # bytes accepted by write()
+        self.bytes_written = 0     # bytes on disk
+        self.overrun_bytes = 0     # bytes discarded because every buffer was busy
+        self.max_backlog = 0       # most buffers ever waiting to be written
+        self._latency = np.zeros(history)
+        self._latency_count = 0
+        self._started = time.monotonic()
+        self.error = None
+
+        self._thread = threading.Thread(target=self._run, name="capture-writer", daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def backlog(self):
+        """Buffers handed to the writer thread and not yet on disk."""
+        return self._full.qsize()
+
+    def _run(self):
+        while True:
+            item = self._full.get()
+            if item is None:
+                self._full.task_done()
+                return
+            buffer, length = item
+            start = time.perf_counter()
+            try:
+                # Full buffers are aligned; a padded tail is trimmed on close
+                size = -(-length // ALIGNMENT) * ALIGNMENT if self.direct else length
+                view = memoryview(buffer)[:size]
+                offset = 0
+                while offset < size:
+                    offset += os.write(self._fd, view[offset:])
+                view.release()
+                self.bytes_written += length
+            except OSError as e:
+                self.error = e
+            self._latency[self._latency_count % len(self._latency)] = time.perf_counter() - start
+            self._latency_count += 1
+            self._free.put(buffer)
+            self._full.task_done()
+
+    def _hand_off(self):
+        self._full.put((self._current, self._fill))
+        self.max_backlog = max(self.max_backlog, self._full.qsize())
+        try:
+            self._current = self._free.get(block=self.block)
+        except queue.Empty:
+            self._current = None
+        self._fill = 0
+
+    def write(self, data):
+        """Queue ``data`` (any bytes-like object or array) for writing; returns bytes accepted."""
+        if self.error is not None:
+            raise self.error
+        source = memoryview(data).cast("B")
+        accepted = 0
+        while accepted < len(source):
+            if self._current is None:
+                # Still waiting for a free buffer: drop rather than stall the caller
+                try:
+                    self._current = self._free.get(block=self.block)
+                except queue.Empty:
+                    self.overrun_bytes += len(source) - accepted
+                    break
+            count = min(len(source) - accepted, self.buffer_bytes - self._fill)
+            self._current[self._fill:self._fill + count] = source[accepted:accepted + count]
+            self._fill += count
+            accepted += count
+            if self._fill == self.buffer_bytes:
+                self._hand_off()
+        self.bytes_in += accepted
+        return accepted
+
+    def flush(self):
+        """Hand off the partly filled buffer and wait until everything queued is on disk."""
+        if self._current is not None and self._fill:
+            if self.direct:
+                # O_DIRECT writes whole pages at aligned offsets; only close() may write a partial one
+                raise ValueError("with direct=True a partial buffer can only be written by close()")
+            self._hand_off()
+        self._full.join()
+
+    def close(self):
+        if self._fd is None:
+            return
+        if self._current is not None and self._fill:
+            self._hand_off()
+        self._full.put(None)
+        self._thread.join()
+        # Drop preallocated space and O_DIRECT padding past the real end
+        os.ftruncate(self._fd, self.bytes_written)
+        os.close(self._fd)
+        self._fd = None
+        if self.error is not None:
+            raise self.error
+
+    def stats(self):
+        count = min(self._latency_count, len(self._latency))
+        latency = self._latency[:count]
+        elapsed = time.monotonic() - self._started
+        return {
+            "bytes_in": self.bytes_in,
+            "bytes_written": self.bytes_written,
+            "overrun_bytes": self.overrun_bytes,
+            "write_mb_s": self.bytes_written / elapsed / 1e6 if elapsed > 0 else 0.0,
+            "writes": self._latency_count,
+            "write_latency_mean_ms": float(latency.mean()) * 1e3 if count else 0.0,
+            "write_latency_p99_ms": float(np.percentile(latency, 99)) * 1e3 if count else 0.0,
+            "write_latency_max_ms": float(latency.max()) * 1e3 if count else 0.0,
+            "backlog_buffers": self.backlog,
+            "max_backlog_buffers": self.max_backlog,
+        }
+
+
+def open_writer(path, nbytes=0, **kwargs):
+    """Opener for ``captureFormat.CaptureRecorder``: a CaptureWriter preallocated to ``nbytes``.
+
+    Blocks when every buffer is busy unless ``block=False`` is passed: the
+    recorder's metadata and pulse index count every sample it is given.
+    """
+    kwargs.setdefault("block", True)
+    return CaptureWriter(path, preallocate=nbytes, **kwargs)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    # Without --rate-mb the producer waits for free buffers, which measures the
+    # disk ceiling; with it, blocks arrive at that rate as from the socket and
+    # anything the disk cannot absorb shows up as overrun_bytes.
+    parser = argparse.ArgumentParser(description="Measure sustained capture-to-disk throughput.")
+    parser.add_argument("path", help="file to write (removed afterwards)")
+    parser.add_argument("--gigabytes", type=float, default=2.0)
+    parser.add_argument("--block-bytes", type=int, default=64 * 1440 * 8, help="bytes per write() call")
+    parser.add_argument("--buffer-mb", type=int, default=16)
+    parser.add_argument("--buffers", type=int, default=4)
+    parser.add_argument("--rate-mb", type=float, default=None, help="incoming rate in MB/s")
+    parser.add_argument("--direct", action="store_true", help="bypass the page cache with O_DIRECT")
+    args = parser.parse_args()
+
+    total = int(args.gigabytes * 1e9)
+    block = np.random.default_rng(0).standard_normal(args.block_bytes // 4, dtype=np.float32)
+    writer = CaptureWriter(args.path, args.buffer_mb << 20, args.buffers, preallocate=total,
+                           direct=args.direct, block=args.rate_mb is None)
+    interval = None if args.rate_mb is None else args.block_bytes / (args.rate_mb * 1e6)
+    start = time.perf_counter()
+    slowest = 0.0
+    for k in range(total // args.block_bytes):
+        if interval is not None:
+            while time.perf_counter() < start + k * interval:
+                time.sleep(0)
+        t = time.perf_counter()
+        writer.write(block)
+        slowest = max(slowest, time.perf_counter() - t)
+    writer.close()
+    elapsed = time.perf_counter() - start
+    stats = writer.stats()
+    os.remove(args.path)
+
+    print(f"{stats['bytes_written'] / elapsed / 1e6:.0f} MB/s to disk, slowest write() call {slowest * 1e3:.2f} ms")
+    for key, value in stats.items():
+        print(f"{key}: {value}")
@@ -0,0 +1,112 @@
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+import numpy as np
+
+# Transmit waveforms: the chirp, one chirp + null pulse period, and pulse
+# trains. ChirpSignal.txLoopChirp grows its train by concatenating one pulse
+# at a time; here the pulse is built once per parameter set (memoized, and
+# returned read-only so every caller can share it) and trains are either a
+# zero-copy broadcast view or filled in one allocation. Whole trains can be
+# large, so they are only memoized on request, within TRAIN_CACHE_BYTES.
+
+TRAIN_CACHE_BYTES = 64 << 20
+
+
+def _frozen(array):
+    array.flags.writeable = False
+    return array
+
+
+@lru_cache(maxsize=64)
+def chirp(f_start, f_end, duration, fs, real=False):
+    """Linear chirp sampled like ``ChirpSignal``: ``0:1/fs:duration`` inclusive.
+
+    Complex analytic by default; ``real=True`` gives the real ``chirp()``
+    output the MATLAB class uses. Cached and read-only.
+    """
+    length = int(round(duration * fs)) + 1
+    t = np.arange(length) / fs
+    rate = (f_end - f_start) / t[-1] if length > 1 else 0.0
+    phase = 2 * np.pi * (f_start * t + 0.5 * rate * t * t)
+    samples = np.cos(phase) if real else np.exp(1j * phase)
+    return _frozen(samples.astype(np.complex64))
+
+
+def pulse_length(duration, fs, duty_cycle=0.5):
+    """Samples in one pulse period: the chirp plus the null that gives ``duty_cycle``."""
+    if not 0 < duty_cycle <= 1:
+        raise ValueError("duty_cycle must be in (0, 1]")
+    return int(round((int(round(duration * fs)) + 1) / duty_cycle))
+
+
+@lru_cache(maxsize=64)
+def pulse(f_start, f_end, duration, fs, duty_cycle=0.5, real=False):
+    """One pulse period: the chirp followed by zeros (``duty_cycle=0.5`` is ``createTxInstance``)."""
+    samples = chirp(f_start, f_end, duration, fs, real)
+    period = np.zeros(pulse_length(duration, fs, duty_cycle), dtype=np.complex64)
+    period[:len(samples)] = samples
+    return _frozen(period)
+
+
+def pulse_matrix(f_start, f_end, duration, fs, pulses, duty_cycle=0.5, real=False):
+    """``(pulses, period)`` read-only view of a train; every row shares the one cached pulse."""
+    return np.broadcast_to(pulse(f_start, f_end, duration, fs, duty_cycle, real),
+                           (pulses, pulse_length(duration, fs, duty_cycle)))
+
+
+class _TrainCache:
+    # Most recently used trains, evicted oldest first to stay within max_bytes
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._trains = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, build):
+        with self._lock:
+            train = self._trains.get(key)
+            if train is not None:
+                self._trains.move_to_end(key)
+                return train
+        train = _frozen(build())
+        if train.nbytes > self.max_bytes:
+            return train
+        with self._lock:
+            if key not in self._trains:
+                self._trains[key] = train
+                self.nbytes += train.nbytes
+            while self.nbytes > self.max_bytes:
+                _, old = self._trains.popitem(last=False)
+                self.nbytes -= old.nbytes
+        return train
+
+    def cache_clear(self):
+        with self._lock:
+            self._trains.clear()
+            self.nbytes = 0
+
+
+_trains = _TrainCache(TRAIN_CACHE_BYTES)
+
+
+def pulse_train(f_start, f_end, duration, fs, pulses, duty_cycle=0.5, real=False, cache=False):
+    """Contiguous train of ``pulses`` periods, as ``txLoopChirp(pulses)`` builds it.
+
+    The train is written into a single allocation by broadcasting the cached
+    pulse, and is a private writable array. With ``cache=True`` recent trains
+    are memoized, read-only, up to ``TRAIN_CACHE_BYTES`` in total; use
+    ``pulse_matrix`` for a train that costs no memory at all.
+    """
+    if cache:
+        key = (f_start, f_end, duration, fs, pulses, duty_cycle, real)
+        return _trains.get(key, lambda: pulse_train(*key))
+    period = pulse(f_start, f_end, duration, fs, duty_cycle, real)
+    train = np.empty((pulses, len(period)), dtype=np.complex64)
+    train[:] = period
+    return train.reshape(-1)
+
+
+def clear_cache():
+    for cached in (chirp, pulse, _trains):
+        cached.cache_clear()
@@ -0,0 +1,205 @@
+import os
+import threading
+from collections import OrderedDict
+from functools import partial
+import numpy as np
+from chirpWaveform import chirp
+
+try:
+    import pyfftw
+    import pyfftw.builders
+except ImportError:  # pyFFTW is optional; scipy.fft or NumPy is used instead
+    pyfftw = None
+try:
+    import scipy.fft as scipy_fft
+except ImportError:  # scipy is optional too
+    scipy_fft = None
+
+# Shared DSP state for every processing path: FFT plans, window functions and
+# chirp reference spectra, each in a bounded LRU cache keyed by size, dtype
+# and parameters. Cached arrays are read-only so any caller (thread) can use
+# them directly. The FFT backend is pyFFTW when installed, else scipy.fft,
+# else NumPy. pyFFTW plans are shape-specific: shapes first seen at run time
+# get a cheap FFTW_ESTIMATE plan, and prewarm() builds FFTW_MEASURE plans for
+# the shapes known at startup. The other backends need no plan, so their
+# cache entries do not depend on the batch size at all.
+#
+# Each transform runs on one thread unless $DSP_FFT_WORKERS (or set_workers)
+# says otherwise: the process pools in pulsePool and stftEngine already keep
+# every core busy, and threads per transform would multiply with them.
+
+BACKEND = "pyfftw" if pyfftw is not None else "scipy" if scipy_fft is not None else "numpy"
+WORKERS = int(os.environ.get("DSP_FFT_WORKERS", "1"))
+
+
+class LruCache:
+    """Thread-safe mapping that keeps the ``maxsize`` most recently used entries."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, build):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+        # Build outside the lock; if two threads race, both results are equal
+        value = build()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        return {"entries": len(self._entries), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+plan_cache = LruCache(64)
+window_cache = LruCache(64)
+reference_cache = LruCache(32)
+
+
+def _frozen(array):
+    array.flags.writeable = False
+    return array
+
+
+# --- FFT plans ----------------------------------------------------------
+
+class _FftwPlan:
+    # An FFTW object reuses its input/output arrays, so calls are serialized
+    # and the output is copied before it is handed back
+    def __init__(self, shape, dtype, n, axis, inverse, effort):
+        builder = pyfftw.builders.ifft if inverse else pyfftw.builders.fft
+        self._fftw = builder(pyfftw.empty_aligned(shape, dtype=dtype), n=n, axis=axis, threads=WORKERS,
+                             planner_effort=effort, auto_align_input=True)
+        self._lock = threading.Lock()
+
+    def __call__(self, x):
+        with self._lock:
+            return self._fftw(x).copy()
+
+
+def _build_plan(shape, dtype, n, axis, inverse, effort):
+    if BACKEND == "pyfftw":
+        return _FftwPlan(shape, dtype, n, axis, inverse, effort)
+    if BACKEND == "scipy":
+        return partial(scipy_fft.ifft if inverse else scipy_fft.fft, n=n, axis=axis, workers=WORKERS)
+    return partial(np.fft.ifft if inverse else np.fft.fft, n=n, axis=axis)
+
+
+def plan(shape, dtype=np.complex64, n=None, axis=-1, inverse=False, effort="FFTW_ESTIMATE"):
+    """Cached transform callable for arrays of ``shape`` and ``dtype``.
+
+    ``effort`` is the FFTW planner effort used if the plan has to be built;
+    it only matters with pyFFTW.
+    """
+    dtype = np.dtype(dtype)
+    shape = tuple(shape)
+    key = (shape if BACKEND == "pyfftw" else None, dtype.str, n, axis, inverse)
+    return plan_cache.get(key, lambda: _build_plan(shape, dtype, n, axis, inverse, effort))
+
+
+def fft(x, n=None, axis=-1):
+    x = np.asarray(x)
+    return plan(x.shape, x.dtype, n, axis)(x)
+
+
+def ifft(x, n=None, axis=-1):
+    x = np.asarray(x)
+    return plan(x.shape, x.dtype, n, axis, inverse=True)(x)
+
+
+# --- windows ------------------------------------------------------------
+
+WINDOWS = {
+    "hann": np.hanning,
+    "hamming": np.hamming,
+    "blackman": np.blackman,
+    "bartlett": np.bartlett,
+    "kaiser": np.kaiser,   # needs beta=
+    "rect": np.ones,
+}
+
+
+def window(name, size, dtype=np.float32, **params):
+    """Cached read-only window, e.g. ``window("hann", 1024)`` or ``window("kaiser", 512, beta=8.6)``."""
+    if name not in WINDOWS:
+        raise ValueError(f"unknown window {name!r}; choose from {sorted(WINDOWS)}")
+    dtype = np.dtype(dtype)
+    key = (name, size, dtype.str, tuple(sorted(params.items())))
+    return window_cache.get(key, lambda: _frozen(WINDOWS[name](size, **params).astype(dtype)))
+
+
+# --- chirp reference spectra ----------------------------------------------
+
+def reference_spectrum(f_start, f_end, duration, fs, fft_size):
+    """Conjugated FFT of the chirp for matched filtering, cached per chirp and FFT size."""
+    key = (f_start, f_end, duration, fs, fft_size)
+
+    def build():
+        spectrum = np.conj(fft(chirp(f_start, f_end, duration, fs), fft_size))
+        return _frozen(spectrum.astype(np.complex64))
+
+    return reference_cache.get(key, build)
+
+
+# --- startup --------------------------------------------------------------
+
+def prewarm(shapes=(), windows=(), chirps=(), dtype=np.complex64):
+    """Build plans, windows and reference spectra ahead of time.
+
+    ``shapes`` are array shapes to transform along the last axis (each is
+    planned with FFTW_MEASURE and run once in both directions); ``windows``
+    are ``(name, size)`` pairs; ``chirps`` are
+    ``(f_start, f_end, duration, fs, fft_size)`` tuples.
+    """
+    for shape in shapes:
+        shape = (shape,) if np.isscalar(shape) else tuple(shape)
+        dummy = np.zeros(shape, dtype=dtype)
+        for inverse in (False, True):
+            plan(shape, dtype, inverse=inverse, effort="FFTW_MEASURE")(dummy)
+    for name, size in windows:
+        window(name, size)
+    for args in chirps:
+        reference_spectrum(*args)
+
+
+def set_workers(count):
+    """Threads per transform from now on; pool initializers pass 1."""
+    global WORKERS
+    if count != WORKERS:
+        WORKERS = count
+        plan_cache.clear()  # existing plans carry the old thread count
+
+
+def stats():
+    return {
+        "backend": BACKEND,
+        "workers": WORKERS,
+        "plans": plan_cache.stats(),
+        "windows": window_cache.stats(),
+        "references": reference_cache.stats(),
+    }
+
+
+def clear():
+    for cache in (plan_cache, window_cache, reference_cache):
+        cache.clear()
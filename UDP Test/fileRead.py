@@ -1,23 +1,35 @@
 import numpy as np
 import matplotlib.pyplot as plt
+from captureReader import CaptureReader
 
 # Define the file path
 file_path = "gnuFileDump/gnuIQRx.exe"  # Update with the actual file path
 
-# Read the binary file (assuming complex float32 format)
-data = np.fromfile(open(file_path, "rb"), dtype=np.complex64)
+# Map the binary file (assuming complex float32 format) without reading it
+reader = CaptureReader(file_path, dtype=np.complex64)
+
+# Only the plotted window is read from disk
+start, stop = 100, 500
+data = reader.read(start, stop)
+sample_index = np.arange(start, start + len(data))
 
 # Extract real, imaginary, and magnitude components
 real_part = np.real(data)
 imag_part = np.imag(data)
 magnitude = np.abs(data)
 
+# Averaged spectrum of the whole capture, streamed through the shared FFT plan and window cache
+fft_size = 1024
+power_db = reader.average_spectrum(fft_size)
+freqs = np.fft.fftshift(np.fft.fftfreq(fft_size))
+
 # Create a figure
-plt.figure(figsize=(12, 6))
+plt.figure(figsize=(12, 9))
+plt.subplot(2, 1, 1)
 
 # Plot real and imaginary components on the same graph
-plt.plot(real_part, label="Real Part", color="b", linestyle='-', alpha=0.7)
-plt.plot(imag_part, label="Imaginary Part", color="r", linestyle='--', alpha=0.7)
+plt.plot(sample_index, real_part, label="Real Part", color="b", linestyle='-', alpha=0.7)
+plt.plot(sample_index, imag_part, label="Imaginary Part", color="r", linestyle='--', alpha=0.7)
 
 # Add title and labels
 plt.title("Real and Imaginary Components of the Received Signal")
@@ -25,9 +37,16 @@ plt.xlabel("Sample Index")
 plt.ylabel("Amplitude")
 plt.legend()
 
-plt.xlim(100, 500)  # Zoom on x-axis from index 100 to 500
+plt.xlim(start, stop)  # Zoom on x-axis from index 100 to 500
 plt.ylim(-1, 1)  # Zoom on y-axis from -0.5 to 0.5
 
+plt.subplot(2, 1, 2)
+plt.plot(freqs, power_db, color="g")
+plt.title(f"Average Power Spectrum ({len(reader) // fft_size} frames of {fft_size})")
+plt.xlabel("Frequency (cycles/sample)")
+plt.ylabel("Power (dB)")
+plt.grid()
+
 # Show the plots
 plt.tight_layout()
 plt.show()
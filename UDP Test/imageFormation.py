@@ -0,0 +1,192 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import dspCache
+from rangeCompression import SPEED_OF_LIGHT
+
+# SAR image formation from a (pulses x samples) complex64 matrix.
+#
+# Rows are pulses in slow time, columns are range bins in fast time. Both
+# algorithms expect range-compressed input (see rangeCompression); pass a
+# RangeCompressor to form_image to compress raw pulses first. Geometry is a
+# straight, constant-velocity track along x, with columns measured in slant
+# range from `near_range`.
+
+
+class SarGeometry:
+    def __init__(self, fc, prf, velocity, fs, near_range):
+        self.fc = fc                    # carrier frequency in Hz
+        self.prf = prf                  # pulse repetition frequency in Hz
+        self.velocity = velocity        # platform speed in m/s
+        self.fs = fs                    # fast-time sample rate in Hz
+        self.near_range = near_range    # slant range of column 0 in m
+
+    @property
+    def wavelength(self):
+        return SPEED_OF_LIGHT / self.fc
+
+    @property
+    def range_bin(self):
+        # Two-way: one sample of delay is half a light-sample of range
+        return SPEED_OF_LIGHT / (2 * self.fs)
+
+    def slant_ranges(self, samples):
+        return self.near_range + self.range_bin * np.arange(samples)
+
+    def track(self, pulses):
+        # Along-track platform positions, centred on the middle pulse
+        return (np.arange(pulses) - pulses / 2) * self.velocity / self.prf
+
+
+# Bytes per (pulse, column) element: the azimuth spectrum of a block plus its
+# margin, and the RCMC and matched filter temporaries of the block itself
+SPECTRUM_BYTES = 24
+WORK_BYTES = 120
+
+
+def _block_layout(rows, samples, max_bytes, margin):
+    # (width, margin) with rows * (width * WORK + (width + margin) * SPECTRUM) <= max_bytes;
+    # the margin gets at most half of the budget so blocks stay a useful width
+    budget = max_bytes // rows
+    margin = min(margin, samples, budget // (2 * SPECTRUM_BYTES))
+    width = max(1, (budget - margin * SPECTRUM_BYTES) // (SPECTRUM_BYTES + WORK_BYTES))
+    return width, margin
+
+
+def _migrate(spectrum, r0, migration, range_bin, in_band):
+    # Range cell migration correction: sample each Doppler row at R0 / D.
+    # A function of its own so the index temporaries are freed on return.
+    width, span = r0.shape[1], spectrum.shape[1]
+    shift = r0 * (1 / migration - 1) / range_bin
+    position = np.arange(width)[np.newaxis, :] + shift
+    del shift
+    lower = np.floor(position).astype(np.int64)
+    frac = (position - lower).astype(np.float32)
+    del position
+    valid = (lower + 1 < span) & in_band
+    lower = np.minimum(lower, span - 2) if span > 1 else np.zeros_like(lower)
+    upper = np.minimum(lower + 1, span - 1)
+    corrected = np.take_along_axis(spectrum, lower, axis=1) * (1 - frac)
+    corrected += np.take_along_axis(spectrum, upper, axis=1) * frac
+    corrected[~valid] = 0
+    return corrected
+
+
+def range_doppler(data, geometry, max_bytes=256 << 20, out=None):
+    """Focus range-compressed data with the range-Doppler algorithm.
+
+    Each block of range columns goes through azimuth FFT, range cell migration
+    correction by vectorized linear interpolation, the azimuth matched filter
+    and the inverse azimuth FFT. Blocks and the extra columns they read for
+    RCMC are sized so the working set stays within about ``max_bytes``;
+    migration longer than that margin allows is cut off. Doppler bins beyond
+    the platform's ``2 v / wavelength`` (a PRF well above the Doppler
+    bandwidth) hold no signal and are zeroed. ``out`` may be a preallocated
+    (for example memory-mapped) complex64 array of the same shape as ``data``.
+    """
+    pulses, samples = data.shape
+    wavelength = geometry.wavelength
+    if out is None:
+        out = np.empty((pulses, samples), dtype=np.complex64)
+
+    doppler = np.fft.fftfreq(pulses, 1 / geometry.prf)[:, np.newaxis]
+    # Migration factor, defined only inside the Doppler band of the platform
+    squint = (wavelength * doppler / (2 * geometry.velocity)) ** 2
+    in_band = squint < 1
+    migration = np.sqrt(np.clip(1 - squint, 1e-6, None))
+    ranges = geometry.slant_ranges(samples)
+
+    # Extra columns a block needs to the right for RCMC, at the largest in-band Doppler
+    margin = int(np.ceil(ranges[-1] * (1 / migration[in_band].min() - 1) / geometry.range_bin)) + 2
+    width, margin = _block_layout(pulses, samples, max_bytes, margin)
+
+    for c0 in range(0, samples, width):
+        c1 = min(c0 + width, samples)
+        stop = min(c1 + margin, samples)
+        spectrum = dspCache.fft(data[:, c0:stop], axis=0).astype(np.complex64, copy=False)
+
+        r0 = ranges[c0:c1][np.newaxis, :]
+        corrected = _migrate(spectrum, r0, migration, geometry.range_bin, in_band)
+        del spectrum
+
+        # Azimuth matched filter in the range-Doppler domain
+        corrected *= np.exp(4j * np.pi * r0 * migration / wavelength).astype(np.complex64)
+        out[:, c0:c1] = dspCache.ifft(corrected, axis=0)
+    return out
+
+
+def _backproject(data, ranges_first, range_bin, wavelength, track, x_grid, r_grid, max_bytes):
+    # Accumulate one block of pulses into an image on the (r_grid x x_grid) pixel grid
+    samples = data.shape[1]
+    image = np.zeros((len(r_grid), len(x_grid)), dtype=np.complex128)
+    pixels = image.size
+    batch = max(1, int(max_bytes // (pixels * 16 * 4)))
+
+    px = x_grid[np.newaxis, np.newaxis, :]
+    pr = r_grid[np.newaxis, :, np.newaxis]
+    for p0 in range(0, len(track), batch):
+        pos = track[p0:p0 + batch, np.newaxis, np.newaxis]
+        distance = np.sqrt((px - pos) ** 2 + pr ** 2)
+        index = (distance - ranges_first) / range_bin
+        lower = np.floor(index).astype(np.int64)
+        frac = index - lower
+        inside = (lower >= 0) & (lower < samples - 1)
+        lower = np.clip(lower, 0, samples - 2)
+
+        rows = data[p0:p0 + batch]
+        flat = lower.reshape(len(rows), -1)
+        low = np.take_along_axis(rows, flat, axis=1).reshape(lower.shape)
+        high = np.take_along_axis(rows, flat + 1, axis=1).reshape(lower.shape)
+        value = low * (1 - frac) + high * frac
+        value *= np.exp(4j * np.pi * distance / wavelength)
+        value[~inside] = 0
+        image += value.sum(axis=0)
+    return image
+
+
+def _backproject_task(args):
+    return _backproject(*args)
+
+
+def backprojection(data, geometry, x_grid, r_grid, workers=None, pulses_per_task=256, max_bytes=64 << 20):
+    """Focus range-compressed data by time-domain backprojection onto a pixel grid.
+
+    Pulses are split into tasks of ``pulses_per_task`` that run on a process
+    pool of ``workers`` (``1`` runs in-process); each task accumulates a
+    partial image and the partial images are summed. Inside a task, pulses are
+    batched so the per-batch temporaries stay near ``max_bytes``. Returns a
+    complex64 image of shape ``(len(r_grid), len(x_grid))``.
+    """
+    x_grid = np.asarray(x_grid, dtype=np.float64)
+    r_grid = np.asarray(r_grid, dtype=np.float64)
+    track = geometry.track(data.shape[0])
+    common = (geometry.near_range, geometry.range_bin, geometry.wavelength)
+    tasks = [(data[p0:p0 + pulses_per_task],) + common + (track[p0:p0 + pulses_per_task], x_grid, r_grid, max_bytes)
+             for p0 in range(0, data.shape[0], pulses_per_task)]
+
+    workers = os.cpu_count() if workers is None else workers
+    image = np.zeros((len(r_grid), len(x_grid)), dtype=np.complex128)
+    if workers <= 1 or len(tasks) == 1:
+        for task in tasks:
+            image += _backproject_task(task)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for partial in pool.map(_backproject_task, tasks):
+                image += partial
+    return image.astype(np.complex64)
+
+
+def form_image(pulses, geometry, mode="rda", compressor=None, **kwargs):
+    """Range-compress (if a RangeCompressor is given) and focus a pulse matrix.
+
+    ``mode`` is ``"rda"`` for range-Doppler or ``"bp"`` for backprojection,
+    which also needs ``x_grid`` and ``r_grid`` keyword arguments.
+    """
+    data = np.asarray(pulses, dtype=np.complex64)
+    if compressor is not None:
+        data = compressor.compress(data)
+    if mode == "rda":
+        return range_doppler(data, geometry, **kwargs)
+    if mode == "bp":
+        return backprojection(data, geometry, **kwargs)
+    raise ValueError(f"unknown image formation mode {mode!r}")
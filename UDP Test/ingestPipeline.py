@@ -0,0 +1,136 @@
+import queue
+import socket
+import threading
+import time
+import numpy as np
+
+
+class IngestPipeline:
+    """Run a receiver on its own thread and hand blocks to consumers through a bounded queue.
+
+    The ingest thread only receives and enqueues, so a slow consumer (such as
+    a matplotlib redraw) never stalls the socket. When the queue is full the
+    oldest block is discarded and counted in ``dropped_blocks``. The socket
+    calls release the GIL, so a thread is enough to keep ingest running while
+    the main thread draws.
+
+    Consumers that must see every sample (recording) pass
+    ``overflow="raise"``: a full queue then stops ingest and sets ``error``
+    to an ``OverflowError``, so everything already queued is a gap-free
+    prefix of the stream and nothing is thrown away behind the consumer's back.
+    """
+
+    def __init__(self, receiver, max_blocks=64, poll_timeout=0.2, overflow="drop_oldest"):
+        if overflow not in ("drop_oldest", "raise"):
+            raise ValueError("overflow must be 'drop_oldest' or 'raise'")
+        self.receiver = receiver
+        self.queue = queue.Queue(maxsize=max_blocks)
+        self.poll_timeout = poll_timeout
+        self.overflow = overflow
+
+        self.blocks = 0           # blocks handed to the queue
+        self.dropped_blocks = 0   # blocks discarded because the queue was full
+        self.skipped_blocks = 0   # blocks the consumer skipped to catch up
+        self.last_block_time = time.monotonic()
+        self.error = None
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="udp-ingest", daemon=True)
+
+    def start(self):
+        # Short socket timeouts let the ingest thread notice stop() promptly
+        self.receiver.sock.settimeout(self.poll_timeout)
+        self.last_block_time = time.monotonic()
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    @property
+    def queue_depth(self):
+        return self.queue.qsize()
+
+    @property
+    def idle_time(self):
+        return time.monotonic() - self.last_block_time
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if not self.receiver.poll():
+                    continue
+            except socket.timeout:
+                continue
+            except OSError as e:
+                if not self._stop.is_set():
+                    self.error = e
+                break
+
+            # One copy per batch of packets, taken out of the ring before the producer laps it
+            parts = self.receiver.peek()
+            block = parts[0].copy() if len(parts) == 1 else np.concatenate(parts)
+            self.receiver.consume(len(block))
+            if not self._offer(block):
+                break
+
+    def _offer(self, block):
+        try:
+            self.queue.put_nowait(block)
+        except queue.Full:
+            if self.overflow == "raise":
+                self.error = OverflowError(f"ingest queue full ({self.queue.maxsize} blocks): the consumer "
+                                           "fell behind the stream, ingest stopped")
+                return False
+            # Drop the oldest block rather than blocking the socket
+            try:
+                self.queue.get_nowait()
+                self.dropped_blocks += 1
+            except queue.Empty:
+                pass
+            self.queue.put_nowait(block)
+        self.blocks += 1
+        self.last_block_time = time.monotonic()
+        return True
+
+    def get(self, timeout=None):
+        """Return the next block in order, or None if nothing arrives within ``timeout``."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def get_latest(self):
+        """Return the newest queued block, skipping any older ones, or None if the queue is empty."""
+        latest = None
+        while True:
+            try:
+                block = self.queue.get_nowait()
+            except queue.Empty:
+                return latest
+            if latest is not None:
+                self.skipped_blocks += 1
+            latest = block
+
+    def stats(self):
+        stats = self.receiver.stats()
+        stats.update({
+            "queue_depth": self.queue_depth,
+            "queue_capacity": self.queue.maxsize,
+            "blocks": self.blocks,
+            "dropped_blocks": self.dropped_blocks,
+            "skipped_blocks": self.skipped_blocks,
+        })
+        return stats
+
+
+def decimate_for_display(block, max_points):
+    # Keep at most max_points samples by striding; returns (view, stride), not a copy
+    step = max(1, -(-len(block) // max_points))
+    return block[::step], step
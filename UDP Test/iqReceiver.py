@@ -0,0 +1,330 @@
+import errno
+import socket
+import sys
+import numpy as np
+from packetFraming import HEADER_SIZE, FramingError, SequenceTracker, decode_header, samples_per_packet
+
+# Linux reports the kernel's per-socket drop counter as ancillary data when
+# SO_RXQ_OVFL is enabled. Python does not export the constant, so fall back
+# to its value from <asm-generic/socket.h>.
+SO_RXQ_OVFL = getattr(socket, "SO_RXQ_OVFL", 40)
+
+# Windows reports a datagram too large for the buffer as an error, not a flag
+MSG_SIZE_ERRORS = {errno.EMSGSIZE, getattr(errno, "WSAEMSGSIZE", 10040)}
+
+SAMPLE_BYTES = np.dtype(np.complex64).itemsize  # 8 bytes per complex float32 sample
+
+
+class IQRingReceiver:
+    """Receive complex64 UDP datagrams straight into a preallocated ring buffer.
+
+    Every datagram is written with ``recv_into`` at the current write position,
+    so no per-packet bytes objects or complex arrays are allocated. Consumers
+    read numpy views of the ring; a view is only valid until the producer laps
+    it, which is reported in ``overrun_samples``.
+
+    With ``framed=True`` each datagram carries a ``packetFraming`` header. The
+    header is scattered into a small side buffer and the payload lands in the
+    ring at the position given by its sample timestamp, so lost packets leave
+    zero-filled gaps and late packets are slotted back where they belong.
+    While the next slot still holds unread samples, datagrams go to a scratch
+    packet instead and are copied in only once the header checks out, so a
+    malformed, duplicate or late packet never overwrites data.
+
+    Datagrams larger than ``packet_size`` are discarded and counted in
+    ``truncated_packets``. Where ``recvmsg_into`` is missing (Windows) the
+    kernel gives no truncation flag, so datagrams are staged in a buffer one
+    byte larger than a packet and any that fill it are rejected.
+
+    ``storage`` may be any writable complex64 array (for example an
+    ``np.memmap`` or a shared-memory backed array) of at least
+    ``capacity`` plus one packet of samples; by default one is allocated.
+    """
+
+    def __init__(self, sock, capacity=1 << 20, packet_size=1472, batch=64, rcvbuf=8 << 20,
+                 storage=None, framed=False):
+        self.sock = sock
+        self.packet_size = packet_size
+        self.framed = framed
+        self.packet_samples = samples_per_packet(packet_size) if framed else packet_size // SAMPLE_BYTES
+        self.payload_size = self.packet_samples * SAMPLE_BYTES
+        self.batch = batch
+
+        # Round the capacity up to whole packets and keep one packet of slack
+        # past the end so a datagram never has to be split across the wrap.
+        self.capacity = -(-capacity // self.packet_samples) * self.packet_samples
+        if storage is None:
+            storage = np.zeros(self.capacity + self.packet_samples, dtype=np.complex64)
+        elif storage.dtype != np.complex64 or len(storage) < self.capacity + self.packet_samples:
+            raise ValueError("storage must be complex64 with room for capacity plus one packet")
+        self.buffer = storage
+        self._raw = memoryview(self.buffer.view(np.uint8))
+
+        self.write_count = 0  # total samples written since start
+        self.read_count = 0   # total samples handed to the consumer
+
+        self.packets = 0
+        self.bytes_received = 0
+        self.truncated_packets = 0   # datagrams larger than packet_size
+        self.partial_packets = 0     # datagrams that were not a whole number of samples
+        self.malformed_packets = 0   # framed datagrams with a missing or invalid header
+        self.overrun_samples = 0     # samples overwritten before the consumer read them
+        self.kernel_drops = 0        # datagrams dropped by the kernel (Linux only)
+        self.gap_samples = 0         # zero-filled samples standing in for lost packets
+        self.late_samples = 0        # samples from late packets written back into a gap
+        self.resyncs = 0             # timestamp jumps too large to fill
+        self.tracker = SequenceTracker()
+        self._timestamp_base = None
+        self._ancillary_size = 0
+
+        self._header = bytearray(HEADER_SIZE)
+        self._scatter = hasattr(self.sock, "recvmsg_into")
+        self._staging = None
+        if not self._scatter:
+            # Platforms without recvmsg_into (Windows) stage the whole datagram,
+            # with a spare byte that only an oversized datagram reaches
+            self._staging = bytearray((HEADER_SIZE if framed else 0) + self.payload_size + 1)
+        if framed:
+            self._scratch = np.zeros(self.packet_samples, dtype=np.complex64)
+            self._scratch_raw = memoryview(self._scratch.view(np.uint8))
+
+        try:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+        except OSError:
+            pass
+
+        if sys.platform.startswith("linux"):
+            try:
+                self.sock.setsockopt(socket.SOL_SOCKET, SO_RXQ_OVFL, 1)
+                self._ancillary_size = socket.CMSG_SPACE(4)
+            except OSError:
+                self._ancillary_size = 0
+
+    @property
+    def available(self):
+        return self.write_count - self.read_count
+
+    @property
+    def dropped_packets(self):
+        if self.framed:
+            return self.tracker.lost_packets + self.truncated_packets
+        return self.kernel_drops + self.truncated_packets
+
+    def _receive(self, view):
+        # Returns (datagram bytes, truncated); in framed mode the header goes to self._header
+        if self._staging is not None:
+            try:
+                nbytes = self.sock.recv_into(self._staging)
+            except OSError as e:
+                if e.errno not in MSG_SIZE_ERRORS:
+                    raise
+                return len(self._staging), True
+            if nbytes == len(self._staging):
+                return nbytes, True
+            header = 0
+            if self.framed:
+                header = HEADER_SIZE
+                self._header[:] = self._staging[:HEADER_SIZE]
+            payload = max(0, nbytes - header)
+            view[:payload] = self._staging[header:header + payload]
+            return nbytes, False
+
+        buffers = [self._header, view] if self.framed else [view]
+        nbytes, ancdata, msg_flags, _ = self.sock.recvmsg_into(buffers, self._ancillary_size)
+        for level, kind, data in ancdata:
+            if level == socket.SOL_SOCKET and kind == SO_RXQ_OVFL and len(data) >= 4:
+                # The counter is cumulative for the socket
+                self.kernel_drops = int.from_bytes(data[:4], sys.byteorder)
+        return nbytes, bool(msg_flags & getattr(socket, "MSG_TRUNC", 0))
+
+    def _recv_one(self):
+        pos = self.write_count % self.capacity
+        start = pos * SAMPLE_BYTES
+        # A framed packet may turn out not to belong at the write position, so
+        # it only goes straight into the ring when that slot is free
+        scratch = self.framed and self.available + self.packet_samples > self.capacity
+        target = self._scratch_raw if scratch else self._raw[start:start + self.payload_size]
+        nbytes, truncated = self._receive(target)
+
+        if truncated:
+            # The rest of an oversized datagram is gone; keep none of it
+            self.truncated_packets += 1
+            return 0
+
+        header = None
+        payload = nbytes
+        if self.framed:
+            try:
+                if nbytes < HEADER_SIZE:
+                    raise FramingError("datagram shorter than the header")
+                header = decode_header(self._header)
+            except FramingError:
+                self.malformed_packets += 1
+                return 0
+            payload = nbytes - HEADER_SIZE
+
+        if payload % SAMPLE_BYTES:
+            self.partial_packets += 1
+
+        samples = payload // SAMPLE_BYTES
+        if header is not None:
+            samples = min(samples, header.samples)
+        if samples == 0:
+            return 0
+
+        if scratch:
+            payload = self._scratch[:samples]
+        else:
+            # Mirror whatever landed in the slack region back to the start of the ring
+            end = pos + samples
+            if end > self.capacity:
+                self.buffer[:end - self.capacity] = self.buffer[self.capacity:end]
+            payload = self.buffer[pos:pos + samples]
+
+        self.packets += 1
+        self.bytes_received += nbytes
+
+        if header is not None:
+            self.tracker.update(header)
+            return self._place(header, payload, scratch)
+        self._advance(samples)
+        return samples
+
+    def _place(self, header, payload, scratch):
+        # ``payload`` is either already at the write position or, with ``scratch``, outside the ring
+        samples = len(payload)
+        if self._timestamp_base is None:
+            self._timestamp_base = header.timestamp - self.write_count
+        index = header.timestamp - self._timestamp_base
+        offset = index - self.write_count
+
+        if offset == 0:
+            if scratch:
+                self._write_at(self.write_count, payload)
+            self._advance(samples)
+            return samples
+
+        if 0 < offset < self.capacity:
+            # Packets went missing: zero the gap and move this payload to its slot
+            payload = payload.copy()
+            self._fill(self.write_count, offset)
+            self._write_at(index, payload)
+            self.gap_samples += offset
+            self._advance(offset + samples)
+            return offset + samples
+
+        if offset > 0:
+            # Too far ahead to bridge; restart the timeline at the current position
+            self.resyncs += 1
+            self._timestamp_base = header.timestamp - self.write_count
+            if scratch:
+                self._write_at(self.write_count, payload)
+            self._advance(samples)
+            return samples
+
+        if index >= self.write_count - self.capacity and index + samples <= self.write_count:
+            # A late packet whose slot is still in the ring fills its gap
+            self._write_at(index, payload.copy())
+            self.late_samples += samples
+        return 0
+
+    def _write_at(self, index, data):
+        start = index % self.capacity
+        first = min(len(data), self.capacity - start)
+        self.buffer[start:start + first] = data[:first]
+        self.buffer[:len(data) - first] = data[first:]
+
+    def _fill(self, index, count):
+        start = index % self.capacity
+        first = min(count, self.capacity - start)
+        self.buffer[start:start + first] = 0
+        self.buffer[:count - first] = 0
+
+    def _advance(self, samples):
+        self.write_count += samples
+        lag = self.write_count - self.read_count
+        if lag > self.capacity:
+            self.overrun_samples += lag - self.capacity
+            self.read_count = self.write_count - self.capacity
+
+    def poll(self, max_packets=None):
+        """Block for one datagram, then drain up to ``max_packets`` more without blocking.
+
+        Returns the number of samples written. Raises ``socket.timeout`` if the
+        blocking receive times out.
+        """
+        max_packets = self.batch if max_packets is None else max_packets
+        total = self._recv_one()
+
+        # A socket with a timeout polls before every receive, so switch it to
+        # non-blocking while draining whatever is already queued
+        timeout = self.sock.gettimeout()
+        self.sock.settimeout(0.0)
+        try:
+            for _ in range(max_packets - 1):
+                total += self._recv_one()
+        except (BlockingIOError, InterruptedError):
+            pass
+        finally:
+            self.sock.settimeout(timeout)
+        return total
+
+    def peek(self, count=None):
+        """Return up to two views covering the oldest unread samples, without consuming them."""
+        count = self.available if count is None else min(count, self.available)
+        pos = self.read_count % self.capacity
+        first = min(count, self.capacity - pos)
+        head = self.buffer[pos:pos + first]
+        if first == count:
+            return (head,)
+        return head, self.buffer[:count - first]
+
+    def consume(self, count):
+        self.read_count += min(count, self.available)
+
+    def read(self, count=None):
+        """Return a contiguous view of unread samples (stopping at the wrap) and consume it."""
+        view = self.peek(count)[0]
+        self.consume(len(view))
+        return view
+
+    def latest(self, count):
+        """Return the newest ``count`` samples as up to two views, regardless of read position."""
+        count = min(count, self.write_count, self.capacity)
+        start = (self.write_count - count) % self.capacity
+        first = min(count, self.capacity - start)
+        head = self.buffer[start:start + first]
+        if first == count:
+            return (head,)
+        return head, self.buffer[:count - first]
+
+    def stats(self):
+        stats = {
+            "packets": self.packets,
+            "bytes": self.bytes_received,
+            "samples": self.write_count,
+            "available": self.available,
+            "dropped_packets": self.dropped_packets,
+            "kernel_drops": self.kernel_drops,
+            "truncated_packets": self.truncated_packets,
+            "partial_packets": self.partial_packets,
+            "overrun_samples": self.overrun_samples,
+        }
+        if self.framed:
+            stats.update(self.tracker.stats())
+            stats.update({
+                "packets": self.packets,
+                "malformed_packets": self.malformed_packets,
+                "gap_samples": self.gap_samples,
+                "late_samples": self.late_samples,
+                "resyncs": self.resyncs,
+            })
+        return stats
+
+
+def open_receiver(udp_ip, udp_port, timeout=None, **kwargs):
+    # Convenience wrapper that binds a UDP socket and wraps it in a ring receiver
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind((udp_ip, udp_port))
+    sock.settimeout(timeout)
+    return IQRingReceiver(sock, **kwargs)
@@ -0,0 +1,190 @@
+import json
+import os
+import sys
+import numpy as np
+from captureReader import CaptureReader
+
+# Multi-resolution min/max envelope of a capture, cached on disk next to it.
+#
+# Level 0 stores, for every `base` samples, the min and max of the real and
+# imaginary parts; each higher level reduces the one below by `factor`. All
+# levels live in one float32 file (<capture>.lod) of rows
+# [real_min, real_max, imag_min, imag_max], described by <capture>.lod.json.
+# A zoom only memory-maps the rows of the level it needs.
+
+COLUMNS = 4
+BUILD_CHUNK_ROWS = 1 << 16
+
+
+def _minmax_rows(samples, base):
+    # Envelope rows for consecutive groups of `base` samples (last group may be short)
+    full = len(samples) // base * base
+    rows = np.empty((-(-len(samples) // base), COLUMNS), dtype=np.float32)
+    if full:
+        groups = samples[:full].reshape(-1, base)
+        re, im = groups.real, groups.imag
+        rows[:full // base] = np.stack([re.min(1), re.max(1), im.min(1), im.max(1)], axis=1)
+    if full < len(samples):
+        tail = samples[full:]
+        rows[-1] = [tail.real.min(), tail.real.max(), tail.imag.min(), tail.imag.max()]
+    return rows
+
+
+def _reduce_rows(rows, factor):
+    # Combine groups of `factor` envelope rows into one (last group may be short)
+    full = len(rows) // factor * factor
+    out = np.empty((-(-len(rows) // factor), COLUMNS), dtype=np.float32)
+    groups = [rows[:full].reshape(-1, factor, COLUMNS)] if full else []
+    if full < len(rows):
+        groups.append(rows[full:][np.newaxis])
+    at = 0
+    for group in groups:
+        out[at:at + len(group), 0::2] = group[:, :, 0::2].min(axis=1)
+        out[at:at + len(group), 1::2] = group[:, :, 1::2].max(axis=1)
+        at += len(group)
+    return out
+
+
+class LodPyramid:
+    def __init__(self, reader, base=64, factor=8, top_rows=1024, rebuild=False):
+        self.reader = reader if isinstance(reader, CaptureReader) else CaptureReader(reader)
+        self.base = base
+        self.factor = factor
+        self.top_rows = top_rows
+        self.data_path = self.reader.file_path + ".lod"
+        self.meta_path = self.reader.file_path + ".lod.json"
+
+        if rebuild or not self._load():
+            self._build()
+
+    def _source_signature(self):
+        st = os.stat(self.reader.file_path)
+        return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "samples": len(self.reader),
+                "dtype": self.reader.dtype.str, "base": self.base, "factor": self.factor}
+
+    def _load(self):
+        try:
+            with open(self.meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if meta.get("source") != self._source_signature() or not os.path.exists(self.data_path):
+            return False
+        self.levels = meta["levels"]  # list of [row offset, row count]
+        return True
+
+    def _build(self):
+        rows = -(-len(self.reader) // self.base)
+        self.levels = []
+        offset = 0
+        while True:
+            self.levels.append([offset, rows])
+            offset += rows
+            if rows <= self.top_rows:
+                break
+            rows = -(-rows // self.factor)
+
+        out = np.memmap(self.data_path, dtype=np.float32, mode="w+", shape=(max(offset, 1), COLUMNS))
+
+        # Level 0 straight from the capture, one chunk of whole buckets at a time
+        row = 0
+        for _, chunk in self.reader.chunks(self.base * BUILD_CHUNK_ROWS):
+            level_rows = _minmax_rows(chunk, self.base)
+            out[row:row + len(level_rows)] = level_rows
+            row += len(level_rows)
+
+        # Each higher level from the one below it
+        for (src_off, src_rows), (dst_off, _) in zip(self.levels, self.levels[1:]):
+            step = self.factor * BUILD_CHUNK_ROWS
+            for i in range(0, src_rows, step):
+                reduced = _reduce_rows(out[src_off + i:src_off + min(i + step, src_rows)], self.factor)
+                start = dst_off + i // self.factor
+                out[start:start + len(reduced)] = reduced
+
+        out.flush()
+        del out
+        with open(self.meta_path, "w") as f:
+            json.dump({"source": self._source_signature(), "levels": self.levels}, f)
+
+    def bucket_size(self, level):
+        return self.base * self.factor ** level
+
+    def level(self, level):
+        """Memory-map the rows of one level only."""
+        offset, rows = self.levels[level]
+        return np.memmap(self.data_path, dtype=np.float32, mode="r",
+                         offset=offset * COLUMNS * 4, shape=(rows, COLUMNS))
+
+    def choose_level(self, span, max_points):
+        # Finest level that keeps the visible span within max_points buckets
+        for level in range(len(self.levels)):
+            if span / self.bucket_size(level) <= max_points:
+                return level
+        return len(self.levels) - 1
+
+    def envelope(self, start, stop, max_points=1500):
+        """Return ``(x, real_min, real_max, imag_min, imag_max)`` for samples ``[start, stop)``.
+
+        Spans of up to ``max_points`` samples come straight from the capture
+        (min equals max); longer spans use the coarsest-sufficient level.
+        """
+        start = max(0, int(start))
+        stop = min(len(self.reader), int(stop))
+        if stop <= start:
+            empty = np.empty(0, dtype=np.float32)
+            return np.empty(0, dtype=np.int64), empty, empty, empty, empty
+
+        if stop - start <= max_points:
+            data = self.reader.read(start, stop)
+            return np.arange(start, stop), data.real, data.real, data.imag, data.imag
+
+        level = self.choose_level(stop - start, max_points)
+        bucket = self.bucket_size(level)
+        first, last = start // bucket, -(-stop // bucket)
+        rows = np.asarray(self.level(level)[first:last])
+        x = np.arange(first, first + len(rows)) * bucket
+        return x, rows[:, 0], rows[:, 1], rows[:, 2], rows[:, 3]
+
+
+def interleave(x, lo, hi):
+    # Draw each bucket as a vertical stroke from min to max: 2 points per bucket
+    return np.repeat(x, 2), np.column_stack([lo, hi]).ravel()
+
+
+class LodPlot:
+    """Keep a matplotlib axis showing the pyramid level that matches its current x-range."""
+
+    def __init__(self, ax, pyramid, max_points=1500):
+        self.ax = ax
+        self.pyramid = pyramid
+        self.max_points = max_points
+        self.real_line, = ax.plot([], [], 'b-', label="Real Part", alpha=0.7, linewidth=0.8)
+        self.imag_line, = ax.plot([], [], 'r-', label="Imaginary Part", alpha=0.7, linewidth=0.8)
+        ax.set_xlim(0, len(pyramid.reader))
+        self.update(ax)
+        ax.callbacks.connect("xlim_changed", self.update)
+
+    def update(self, ax):
+        start, stop = ax.get_xlim()
+        x, re_lo, re_hi, im_lo, im_hi = self.pyramid.envelope(start, stop, self.max_points)
+        self.real_line.set_data(*interleave(x, re_lo, re_hi))
+        self.imag_line.set_data(*interleave(x, im_lo, im_hi))
+        ax.figure.canvas.draw_idle()
+
+
+if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+
+    # Usage: python lodPyramid.py <capture file>
+    file_path = sys.argv[1] if len(sys.argv) > 1 else "gnuFileDump/gnuIQRx.exe"
+    pyramid = LodPyramid(file_path)
+
+    fig, ax = plt.subplots(figsize=(12, 6))
+    plot = LodPlot(ax, pyramid)
+    ax.set_title("Received Signal (min/max envelope)")
+    ax.set_xlabel("Sample Index")
+    ax.set_ylabel("Amplitude")
+    ax.legend()
+    ax.grid()
+    plt.tight_layout()
+    plt.show()
@@ -0,0 +1,209 @@
+import struct
+import time
+from collections import namedtuple
+import numpy as np
+
+# VITA-49-style header, network byte order, 32 bytes so the complex64 payload
+# that follows stays 8-byte aligned:
+#   magic       u16   0x4951 ("IQ")
+#   version     u8
+#   flags       u8    FLAG_* bits
+#   stream_id   u32
+#   sequence    u32   wraps at 2**32
+#   samples     u16   complex64 samples in the payload
+#   reserved    u16
+#   timestamp   u64   sample-clock index of the first payload sample
+#   send_ns     u64   sender's monotonic clock in nanoseconds (for jitter)
+HEADER = struct.Struct("!HBBIIHHQQ")
+HEADER_SIZE = HEADER.size
+MAGIC = 0x4951
+VERSION = 1
+
+FLAG_START_OF_BURST = 0x01
+FLAG_END_OF_BURST = 0x02
+
+SAMPLE_BYTES = np.dtype(np.complex64).itemsize
+SEQUENCE_MODULO = 1 << 32
+
+PacketHeader = namedtuple("PacketHeader", "version flags stream_id sequence samples timestamp send_ns")
+
+
+class FramingError(ValueError):
+    pass
+
+
+def samples_per_packet(packet_size):
+    # Whole complex samples that fit after the header, so no sample is ever split
+    count = (packet_size - HEADER_SIZE) // SAMPLE_BYTES
+    if count <= 0:
+        raise FramingError(f"packet size {packet_size} leaves no room for samples")
+    return count
+
+
+def decode_header(data):
+    magic, version, flags, stream_id, sequence, samples, _, timestamp, send_ns = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise FramingError(f"bad magic 0x{magic:04x}")
+    if version != VERSION:
+        raise FramingError(f"unsupported version {version}")
+    return PacketHeader(version, flags, stream_id, sequence, samples, timestamp, send_ns)
+
+
+def decode(data):
+    """Split a datagram into its header and a zero-copy complex64 view of the payload."""
+    header = decode_header(data)
+    payload_bytes = len(data) - HEADER_SIZE
+    if payload_bytes < header.samples * SAMPLE_BYTES:
+        raise FramingError(f"payload holds {payload_bytes} bytes, header claims {header.samples} samples")
+    payload = np.frombuffer(data, dtype=np.complex64, count=header.samples, offset=HEADER_SIZE)
+    return header, payload
+
+
+class PacketEncoder:
+    """Frame a complex64 sample stream into numbered, timestamped datagrams.
+
+    The sequence number and sample clock carry over between calls, so a
+    stream can be encoded block by block.
+    """
+
+    header_size = HEADER_SIZE
+
+    def __init__(self, packet_size=1472, stream_id=0, timestamp=0):
+        self.packet_size = packet_size
+        self.samples_per_packet = samples_per_packet(packet_size)
+        self.stream_id = stream_id
+        self.sequence = 0
+        self.timestamp = timestamp
+        self._first = True
+
+        # One reusable datagram buffer; sendto copies it into the kernel
+        self._buffer = bytearray(HEADER_SIZE + self.samples_per_packet * SAMPLE_BYTES)
+        self._view = memoryview(self._buffer)
+        self._payload = np.frombuffer(self._buffer, dtype=np.complex64, offset=HEADER_SIZE)
+
+    def encode_into(self, samples, flags=0):
+        """Write one packet for ``samples`` into the shared buffer and return a view of it.
+
+        The view is overwritten by the next call.
+        """
+        count = len(samples)
+        if count > self.samples_per_packet:
+            raise FramingError(f"{count} samples do not fit in a {self.packet_size}-byte packet")
+        if self._first:
+            flags |= FLAG_START_OF_BURST
+            self._first = False
+
+        HEADER.pack_into(self._buffer, 0, MAGIC, VERSION, flags, self.stream_id, self.sequence,
+                         count, 0, self.timestamp, time.monotonic_ns())
+        self._payload[:count] = samples
+
+        self.sequence = (self.sequence + 1) % SEQUENCE_MODULO
+        self.timestamp += count
+        return self._view[:HEADER_SIZE + count * SAMPLE_BYTES]
+
+    def frames(self, samples, end_of_burst=False):
+        """Yield packet views covering ``samples``; each is only valid until the next is yielded."""
+        samples = np.asarray(samples, dtype=np.complex64)
+        step = self.samples_per_packet
+        for i in range(0, len(samples), step):
+            last = end_of_burst and i + step >= len(samples)
+            yield self.encode_into(samples[i:i + step], FLAG_END_OF_BURST if last else 0)
+
+    def encode(self, samples, end_of_burst=False):
+        # Independent copies of every packet, for callers that need to keep them
+        return [bytes(frame) for frame in self.frames(samples, end_of_burst)]
+
+
+class RawEncoder:
+    """Split a complex64 stream into bare datagrams with no header.
+
+    This is what a GNU Radio UDP Source (and ``iqReceiver`` with
+    ``framed=False``) expects; loss and reordering cannot be detected.
+    """
+
+    header_size = 0
+
+    def __init__(self, packet_size=1472):
+        self.packet_size = packet_size
+        self.samples_per_packet = packet_size // SAMPLE_BYTES
+
+    def frames(self, samples, end_of_burst=False):
+        samples = np.ascontiguousarray(samples, dtype=np.complex64)
+        step = self.samples_per_packet
+        for i in range(0, len(samples), step):
+            yield memoryview(samples[i:i + step]).cast("B")
+
+    def encode(self, samples, end_of_burst=False):
+        return [bytes(frame) for frame in self.frames(samples, end_of_burst)]
+
+
+class SequenceTracker:
+    """Track loss, reordering and inter-arrival jitter from packet headers.
+
+    Jitter follows RFC 3550: the smoothed absolute change in transit time,
+    using the sender's monotonic timestamp, so any clock offset between the
+    two hosts cancels out.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.expected_sequence = None
+        self.packets = 0
+        self.lost_packets = 0       # sequence numbers skipped over (may later arrive late)
+        self.late_packets = 0       # arrived after a higher sequence number
+        self.duplicate_packets = 0
+        self.jitter_ns = 0.0
+        self.max_jitter_ns = 0.0
+        self._last_transit = None
+
+    def update(self, header, arrival_ns=None):
+        """Record one header and return its sequence offset from the expected value.
+
+        Zero means in order, a positive value is the number of packets
+        skipped, and a negative value means the packet is late or duplicated.
+        """
+        arrival_ns = time.monotonic_ns() if arrival_ns is None else arrival_ns
+        self.packets += 1
+
+        transit = arrival_ns - header.send_ns
+        if self._last_transit is not None:
+            self.jitter_ns += (abs(transit - self._last_transit) - self.jitter_ns) / 16
+            self.max_jitter_ns = max(self.max_jitter_ns, self.jitter_ns)
+        self._last_transit = transit
+
+        if self.expected_sequence is None:
+            self.expected_sequence = (header.sequence + 1) % SEQUENCE_MODULO
+            return 0
+
+        offset = (header.sequence - self.expected_sequence) % SEQUENCE_MODULO
+        if offset >= SEQUENCE_MODULO // 2:
+            offset -= SEQUENCE_MODULO
+
+        if offset >= 0:
+            self.lost_packets += offset
+            self.expected_sequence = (header.sequence + 1) % SEQUENCE_MODULO
+        elif offset == -1:
+            self.duplicate_packets += 1
+        else:
+            # A packet we counted as lost turned up after all
+            self.late_packets += 1
+            self.lost_packets = max(0, self.lost_packets - 1)
+        return offset
+
+    @property
+    def loss_ratio(self):
+        total = self.packets + self.lost_packets
+        return self.lost_packets / total if total else 0.0
+
+    def stats(self):
+        return {
+            "packets": self.packets,
+            "lost_packets": self.lost_packets,
+            "late_packets": self.late_packets,
+            "duplicate_packets": self.duplicate_packets,
+            "loss_ratio": self.loss_ratio,
+            "jitter_us": self.jitter_ns / 1e3,
+            "max_jitter_us": self.max_jitter_ns / 1e3,
+        }
@@ -0,0 +1,197 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import dspCache
+from rangeCompression import RangeCompressor
+
+
+# Worker-process state, set once by _init_worker
+_slots_in = None
+_slots_out = None
+_kernel = None
+_segments = ()
+
+
+def _range_kernel(f_start, f_end, duration, fs):
+    compressor = RangeCompressor(f_start, f_end, duration, fs)
+    return compressor.compress
+
+
+def _fft_kernel():
+    return dspCache.fft
+
+
+KERNELS = {"range": _range_kernel, "fft": _fft_kernel}
+
+
+def _init_worker(in_name, out_name, shape, kernel, kernel_args):
+    global _slots_in, _slots_out, _kernel, _segments
+    # Pool workers share the parent's resource tracker, so attaching here does
+    # not make the segments outlive (or die with) this worker
+    segment_in = shared_memory.SharedMemory(name=in_name)
+    segment_out = shared_memory.SharedMemory(name=out_name)
+    _segments = (segment_in, segment_out)
+    dspCache.set_workers(1)  # the pool already runs one worker per core
+    _slots_in = np.ndarray(shape, dtype=np.complex64, buffer=segment_in.buf)
+    _slots_out = np.ndarray(shape, dtype=np.complex64, buffer=segment_out.buf)
+    _kernel = KERNELS[kernel](*kernel_args)
+
+
+def _process_slot(slot, rows):
+    # Only the slot number and row count cross the process boundary
+    _slots_out[slot, :rows] = _kernel(_slots_in[slot, :rows])
+    return slot
+
+
+class PulsePool:
+    """Process pulse blocks on a pool of worker processes through shared memory.
+
+    Two shared-memory segments each hold ``slots`` slots of up to
+    ``max_pulses x samples`` complex64 samples, one for input and one for
+    output. A block is copied into a free input slot (or received straight
+    into ``input_slot()``), and the task sent to a worker is just the slot
+    number; the worker writes its result into the matching output slot. Sample
+    arrays are never pickled. Results come back in submission order, and a
+    slot is reused only after its result has been handed out.
+
+    ``kernel`` is ``"range"`` (range compression, ``kernel_args`` being
+    ``(f_start, f_end, duration, fs)``) or ``"fft"``; each worker builds its
+    kernel once, so per-chirp caches stay warm.
+    """
+
+    def __init__(self, samples, max_pulses=64, kernel="range", kernel_args=(), workers=None, slots=None):
+        self.samples = samples
+        self.max_pulses = max_pulses
+        self.workers = os.cpu_count() if workers is None else workers
+        self.slots = 2 * self.workers if slots is None else slots
+        shape = (self.slots, max_pulses, samples)
+        nbytes = int(np.prod(shape)) * np.dtype(np.complex64).itemsize
+
+        self._segment_in = shared_memory.SharedMemory(create=True, size=nbytes)
+        self._segment_out = shared_memory.SharedMemory(create=True, size=nbytes)
+        self._in = np.ndarray(shape, dtype=np.complex64, buffer=self._segment_in.buf)
+        self._out = np.ndarray(shape, dtype=np.complex64, buffer=self._segment_out.buf)
+        self._free = deque(range(self.slots))
+        self._pending = deque()  # (future, slot, rows) in submission order
+        self._held = None        # slot whose result the caller is still reading
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker,
+            initargs=(self._segment_in.name, self._segment_out.name, shape, kernel, tuple(kernel_args)))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def free_slots(self):
+        return len(self._free)
+
+    @property
+    def in_flight(self):
+        return len(self._pending)
+
+    def input_slot(self):
+        """A writable ``(max_pulses, samples)`` view of the next free input slot, or None."""
+        self._release_held()
+        return self._in[self._free[0]] if self._free else None
+
+    def submit(self, pulses=None, rows=None):
+        """Queue a block for processing.
+
+        Pass the pulses to copy them into the next free slot, or fill
+        ``input_slot()`` in place and pass only ``rows``. Raises RuntimeError
+        when every slot is in use; ``map`` handles that flow control itself.
+        """
+        self._release_held()
+        if not self._free:
+            raise RuntimeError("all slots are in use; collect a result before submitting more")
+        slot = self._free[0]
+        if pulses is not None:
+            pulses = np.asarray(pulses, dtype=np.complex64).reshape(-1, self.samples)
+            rows = len(pulses)
+            if rows > self.max_pulses:
+                raise ValueError(f"block has {rows} pulses; the pool holds at most {self.max_pulses}")
+            self._in[slot, :rows] = pulses
+        elif rows is None or not 0 < rows <= self.max_pulses:
+            raise ValueError("rows must be between 1 and max_pulses when filling input_slot()")
+        self._free.popleft()
+        self._pending.append((self._pool.submit(_process_slot, slot, rows), slot, rows))
+
+    def next_result(self, copy=True, timeout=None):
+        """Wait for the oldest submitted block and return its result.
+
+        With ``copy=False`` the result is a view into shared memory that stays
+        valid until the next call on this pool (and never after ``close()``).
+        """
+        self._release_held()
+        if not self._pending:
+            raise RuntimeError("no blocks are in flight")
+        future, slot, rows = self._pending[0]
+        future.result(timeout)
+        self._pending.popleft()
+        result = self._out[slot, :rows]
+        if copy:
+            self._free.append(slot)
+            return result.copy()
+        self._held = slot
+        return result
+
+    def _release_held(self):
+        if self._held is not None:
+            self._free.append(self._held)
+            self._held = None
+
+    def map(self, blocks, copy=True):
+        """Process an iterable of blocks, yielding results in order while keeping every slot busy."""
+        for block in blocks:
+            if not self._free and self._held is None:
+                yield self.next_result(copy)
+            self.submit(block)
+        while self._pending:
+            yield self.next_result(copy)
+
+    def close(self):
+        if self._pool is None:
+            return
+        self._pool.shutdown(wait=True)
+        self._pool = None
+        self._in = self._out = None
+        for segment in (self._segment_in, self._segment_out):
+            segment.close()
+            segment.unlink()
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Compare in-process and pooled range compression throughput.")
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4, os.cpu_count()])
+    parser.add_argument("--pulses", type=int, default=64, help="pulses per block")
+    parser.add_argument("--samples", type=int, default=8192, help="samples per pulse")
+    parser.add_argument("--blocks", type=int, default=32)
+    args = parser.parse_args()
+
+    chirp = (1e6, 10e6, 20e-6, 40e6)
+    rng = np.random.default_rng(0)
+    block = (rng.standard_normal((args.pulses, args.samples))
+             + 1j * rng.standard_normal((args.pulses, args.samples))).astype(np.complex64)
+    total = args.blocks * block.size
+
+    compressor = RangeCompressor(*chirp)
+    start = time.perf_counter()
+    for _ in range(args.blocks):
+        compressor.compress(block)
+    print(f"in-process      {total / (time.perf_counter() - start) / 1e6:8.1f} MS/s")
+
+    for workers in sorted(set(args.workers)):
+        with PulsePool(args.samples, args.pulses, "range", chirp, workers=workers) as pool:
+            list(pool.map([block] * workers))  # start the workers and warm their caches
+            start = time.perf_counter()
+            for _ in pool.map([block] * args.blocks, copy=False):
+                pass
+            print(f"{workers:2d} worker(s)    {total / (time.perf_counter() - start) / 1e6:8.1f} MS/s")
@@ -0,0 +1,192 @@
+import argparse
+import socket
+import time
+from collections import namedtuple
+import numpy as np
+from chirpWaveform import pulse
+from packetFraming import PacketEncoder
+from rangeCompression import SPEED_OF_LIGHT
+from ratePacer import send_paced
+from signalSources import NoiseSource, SignalSource
+
+# Hardware-free stand-in for the B200 front end. It streams what the receiver
+# would see while ChirpSignal.txLoopChirp plays: the looped chirp + null,
+# echoed by point targets at given ranges with Doppler, plus receiver noise,
+# framed and paced onto UDP exactly like sendUDP.py, with optional packet
+# loss. Pair it with receiveUDP.py (or --check) to exercise the whole
+# receive and processing chain without a radio.
+#
+#   python radarSimulator.py --target 1500 --target 4200:30:0.5 --noise-power 0.01 --loss 0.001
+
+# range in metres, closing velocity in m/s (positive = approaching), linear amplitude
+Target = namedtuple("Target", "range velocity amplitude", defaults=(0.0, 1.0))
+
+
+def parse_target(text):
+    """Parse ``RANGE[:VELOCITY[:AMPLITUDE]]`` from the command line."""
+    return Target(*(float(part) for part in text.split(":")))
+
+
+class EchoSource(SignalSource):
+    """Received signal for a looped chirp + null: one delayed, Doppler-shifted echo per target.
+
+    The transmit loop is periodic, so each echo is one period of the transmit
+    waveform circularly delayed by the two-way travel time, applied as a
+    phase ramp on its spectrum so fractional-sample delays are exact. Echoes
+    of stationary targets are summed once up front; moving targets keep their
+    own period and get a phase-continuous Doppler rotation per block. Delays
+    stay fixed over the run (stop-and-hop), and ranges beyond one period
+    alias as they would on the real loop.
+    """
+
+    def __init__(self, f_start, f_end, duration, targets, fs=None, block_size=4096,
+                 center_freq=80e6, noise_power=0.0, seed=None, real=False, duty_cycle=0.5):
+        fs = 20 * f_end if fs is None else fs
+        super().__init__(fs, block_size)
+        self.targets = list(targets)
+        self.center_freq = center_freq
+
+        # One period of the transmitted loop
+        tx_period = pulse(f_start, f_end, duration, fs, duty_cycle, real)
+        self.period = len(tx_period)
+        self.tx_period = tx_period
+
+        spectrum = np.fft.fft(tx_period)
+        cycles = np.fft.fftfreq(self.period)  # cycles per sample
+        self._static = np.zeros(self.period, dtype=np.complex64)
+        self._moving = []  # [echo period, phase step per sample, running phase]
+        for target in self.targets:
+            delay = 2 * target.range / SPEED_OF_LIGHT * fs
+            echo = np.fft.ifft(spectrum * np.exp(-2j * np.pi * cycles * delay)) * target.amplitude
+            doppler = 2 * target.velocity * center_freq / SPEED_OF_LIGHT
+            if doppler == 0:
+                self._static += echo.astype(np.complex64)
+            else:
+                self._moving.append([echo.astype(np.complex64), 2 * np.pi * doppler / fs, 0.0])
+
+        self.noise = NoiseSource(fs, block_size, noise_power, seed) if noise_power > 0 else None
+        self._offsets = np.arange(block_size)
+        self._index = np.zeros(block_size, dtype=np.int64)
+        self._phase = np.zeros(block_size)
+        self._rotation = np.zeros(block_size, dtype=np.complex64)
+        self._scratch = np.zeros(block_size, dtype=np.complex64)
+
+    def delay_samples(self, target):
+        return 2 * target.range / SPEED_OF_LIGHT * self.fs
+
+    def fill(self, out):
+        n = len(out)
+        index = self._index[:n]
+        np.add(self._offsets[:n], self.position % self.period, out=index)
+        np.remainder(index, self.period, out=index)
+        np.take(self._static, index, out=out)
+
+        phase, rotation, scratch = self._phase[:n], self._rotation[:n], self._scratch[:n]
+        for moving in self._moving:
+            echo, step, phase0 = moving
+            np.multiply(self._offsets[:n], step, out=phase)
+            phase += phase0
+            np.cos(phase, out=rotation.real)
+            np.sin(phase, out=rotation.imag)
+            np.take(echo, index, out=scratch)
+            scratch *= rotation
+            out += scratch
+            moving[2] = (phase0 + step * n) % (2 * np.pi)
+
+        if self.noise is not None:
+            self.noise.fill(scratch)
+            out += scratch
+
+
+class LossySocket:
+    """Wrap a UDP socket and silently drop each datagram with probability ``loss``.
+
+    Dropped packets still consume a sequence number in the encoder, so the
+    receiver sees them as real gaps.
+    """
+
+    def __init__(self, sock, loss=0.0, seed=None):
+        self.sock = sock
+        self.loss = loss
+        self.rng = np.random.default_rng(seed)
+        self.sent = 0
+        self.dropped = 0
+
+    def sendto(self, data, address):
+        if self.loss > 0 and self.rng.random() < self.loss:
+            self.dropped += 1
+            return len(data)
+        self.sent += 1
+        return self.sock.sendto(data, address)
+
+
+def simulate(address, source, rate=None, duration=None, loss=0.0, packet_size=1472, burst_packets=8,
+             sock=None, seed=None):
+    """Stream ``source`` to ``address`` at ``rate`` samples/sec (default: the source's fs).
+
+    Returns the pacer report plus the packets sent and deliberately dropped.
+    """
+    own_socket = sock is None
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM) if own_socket else sock
+    lossy = LossySocket(sock, loss, seed)
+    encoder = PacketEncoder(packet_size)
+    blocks = source if duration is None else source.take(duration)
+    try:
+        report = send_paced(lossy, address, encoder, blocks, rate or source.fs, burst_packets)
+    finally:
+        if own_socket:
+            sock.close()
+    report.update({"packets_sent": lossy.sent, "packets_dropped": lossy.dropped})
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream simulated radar echoes as framed UDP IQ packets.")
+    parser.add_argument("--ip", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--fs", type=float, default=2e6, help="simulated sample rate in S/s")
+    parser.add_argument("--rate", type=float, default=None, help="stream rate in S/s (default: --fs)")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds of signal to send")
+    parser.add_argument("--f-start", type=float, default=0.0)
+    parser.add_argument("--f-end", type=float, default=0.5e6)
+    parser.add_argument("--chirp-duration", type=float, default=100e-6)
+    parser.add_argument("--center-freq", type=float, default=80e6, help="carrier used for Doppler")
+    parser.add_argument("--target", type=parse_target, action="append", default=[],
+                        help="RANGE[:VELOCITY[:AMPLITUDE]], repeatable")
+    parser.add_argument("--noise-power", type=float, default=0.0)
+    parser.add_argument("--loss", type=float, default=0.0, help="probability of dropping each packet")
+    parser.add_argument("--packet-size", type=int, default=1472)
+    parser.add_argument("--burst", type=int, default=8, help="packets per pacing tick")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--check", action="store_true",
+                        help="also receive on --ip/--port in this process and report what arrived")
+    args = parser.parse_args()
+
+    targets = args.target or [Target(1500.0)]
+    samples_per_packet = PacketEncoder(args.packet_size).samples_per_packet
+    source = EchoSource(args.f_start, args.f_end, args.chirp_duration, targets, args.fs,
+                        block_size=samples_per_packet * args.burst, center_freq=args.center_freq,
+                        noise_power=args.noise_power, seed=args.seed)
+    for target in targets:
+        print(f"target at {target.range:.1f} m -> delay {source.delay_samples(target):.2f} samples "
+              f"(period {source.period}), {target.velocity:+.1f} m/s")
+
+    pipeline = None
+    if args.check:
+        from iqReceiver import open_receiver
+        from ingestPipeline import IngestPipeline
+        receiver = open_receiver(args.ip, args.port, packet_size=args.packet_size, framed=True)
+        pipeline = IngestPipeline(receiver).start()
+
+    report = simulate((args.ip, args.port), source, args.rate, args.duration, args.loss,
+                      args.packet_size, args.burst, seed=args.seed)
+    for key, value in report.items():
+        print(f"{key}: {value}")
+
+    if pipeline is not None:
+        time.sleep(0.5)  # let the receiver drain its socket
+        pipeline.stop()
+        stats = pipeline.stats()
+        print(f"received {stats['packets']} packets, lost {stats['lost_packets']} "
+              f"(dropped on purpose {report['packets_dropped']}), kernel drops {stats['kernel_drops']}")
+        receiver.sock.close()
@@ -0,0 +1,122 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+import dspCache
+from chirpWaveform import chirp
+
+# Matched-filter range compression for the receive path. Received samples are
+# correlated against the transmitted chirp in the frequency domain, so the
+# echo shows up as a compressed peak whose position gives the delay to well
+# under one sample, even in noise (unlike ChirpSignal.calculateDistance,
+# which takes the first non-zero sample).
+
+SPEED_OF_LIGHT = 299792458.0
+
+
+def next_fast_len(n):
+    # Smallest 2-3-5-smooth size >= n, which the FFT handles efficiently
+    best = 1 << max(0, (n - 1).bit_length())
+    p5 = 1
+    while p5 < best:
+        p35 = p5
+        while p35 < best:
+            size = p35
+            while size < n:
+                size *= 2
+            best = min(best, size)
+            p35 *= 3
+        p5 *= 5
+    return best
+
+
+def chirp_pulse(f_start, f_end, duration, fs):
+    """Complex linear chirp sampled like ``ChirpSignal``: ``0:1/fs:duration`` inclusive (cached, read-only)."""
+    return chirp(f_start, f_end, duration, fs)
+
+
+class RangeCompressor:
+    """Correlate received IQ against a chirp, either per pulse or as a continuous stream.
+
+    ``compress`` range-compresses one pulse or a 2-D (pulses x samples) batch in
+    a single batched FFT. ``process`` runs overlap-save over a continuous
+    stream: it accepts blocks of any size and returns the correlation for every
+    sample position whose full chirp-length window has arrived, so output
+    lags input by ``len(pulse) - 1`` samples.
+    """
+
+    def __init__(self, f_start, f_end, duration, fs=None, segment_size=None):
+        self.f_start = f_start
+        self.f_end = f_end
+        self.duration = duration
+        self.fs = 20 * f_end if fs is None else fs  # ChirpSignal's default sample rate
+        self.pulse_length = int(round(duration * self.fs)) + 1
+
+        # Overlap-save segment: a few chirp lengths keeps the overlap overhead low
+        if segment_size is None:
+            segment_size = next_fast_len(max(1024, 4 * self.pulse_length))
+        if segment_size < self.pulse_length:
+            raise ValueError("segment_size must be at least the chirp length")
+        self.segment_size = segment_size
+        self.hop = segment_size - self.pulse_length + 1
+        self._history = np.zeros(0, dtype=np.complex64)
+        self.position = 0  # stream index of the next output sample
+
+    def spectrum(self, fft_size):
+        return dspCache.reference_spectrum(self.f_start, self.f_end, self.duration, self.fs, fft_size)
+
+    def compress(self, pulses):
+        """Range-compress pulses along the last axis; output keeps the input length.
+
+        Output index ``k`` is the correlation at a delay of ``k`` samples.
+        """
+        pulses = np.asarray(pulses, dtype=np.complex64)
+        samples = pulses.shape[-1]
+        fft_size = next_fast_len(samples + self.pulse_length - 1)
+        spectra = dspCache.fft(pulses, fft_size)
+        spectra *= self.spectrum(fft_size)
+        return dspCache.ifft(spectra)[..., :samples].astype(np.complex64, copy=False)
+
+    def process(self, block):
+        """Overlap-save a stream block; returns outputs starting at stream index ``self.position``."""
+        data = np.concatenate([self._history, np.asarray(block, dtype=np.complex64)])
+        segments = (len(data) - self.pulse_length + 1) // self.hop if len(data) >= self.segment_size else 0
+        if segments == 0:
+            self._history = data
+            return np.zeros(0, dtype=np.complex64)
+
+        # Strided, zero-copy view of every full segment, transformed as one batch
+        frames = sliding_window_view(data, self.segment_size)[::self.hop][:segments]
+        spectra = dspCache.fft(frames)
+        spectra *= self.spectrum(self.segment_size)
+        out = dspCache.ifft(spectra)[:, :self.hop].astype(np.complex64, copy=False).ravel()
+
+        self._history = data[segments * self.hop:].copy()
+        self.position += len(out)
+        return out
+
+    def reset(self):
+        self._history = np.zeros(0, dtype=np.complex64)
+        self.position = 0
+
+
+def peak_delay(compressed, axis=-1):
+    """Sub-sample delay of the strongest return using parabolic interpolation on |y|.
+
+    Works on a single compressed pulse or a batch (one delay per pulse).
+    """
+    magnitude = np.abs(compressed)
+    k = np.argmax(magnitude, axis=axis)
+    mag = np.moveaxis(magnitude, axis, -1)
+    n = mag.shape[-1]
+    left = np.take_along_axis(mag, np.expand_dims(np.clip(k - 1, 0, n - 1), -1), -1)[..., 0]
+    centre = np.take_along_axis(mag, np.expand_dims(k, -1), -1)[..., 0]
+    right = np.take_along_axis(mag, np.expand_dims(np.clip(k + 1, 0, n - 1), -1), -1)[..., 0]
+    denominator = left - 2 * centre + right
+    with np.errstate(divide="ignore", invalid="ignore"):
+        shift = np.where(denominator != 0, 0.5 * (left - right) / denominator, 0.0)
+    shift = np.where((k == 0) | (k == n - 1), 0.0, shift)
+    return k + shift
+
+
+def delay_to_range(delay_samples, fs):
+    # Two-way travel: range is half the distance light covers in the delay
+    return SPEED_OF_LIGHT * np.asarray(delay_samples) / fs / 2
@@ -0,0 +1,129 @@
+import argparse
+import socket
+import time
+from packetFraming import SAMPLE_BYTES, PacketEncoder
+from signalSources import ToneSource
+
+
+class RatePacer:
+    """Schedule sends against a monotonic deadline so the long-run rate matches ``sample_rate``.
+
+    The deadline for the next burst is ``start + samples_sent / sample_rate``,
+    so time spent inside ``sendto`` is absorbed instead of accumulating as
+    drift. Waits sleep until ``spin`` seconds before the deadline and busy-wait
+    the rest, which keeps MS/s rates accurate despite coarse sleep granularity.
+    If the sender falls more than ``max_lag`` seconds behind (for example after
+    being descheduled) the schedule restarts instead of flooding the receiver
+    to catch up; those restarts are reported as ``slips``.
+    """
+
+    def __init__(self, sample_rate, spin=0.0005, max_lag=0.05):
+        if sample_rate <= 0:
+            raise ValueError("sample_rate must be positive")
+        self.sample_rate = sample_rate
+        self.spin_ns = int(spin * 1e9)
+        self.max_lag_ns = int(max_lag * 1e9)
+        self._ns_per_sample = 1e9 / sample_rate
+        self.start()
+
+    def start(self):
+        self.start_ns = time.monotonic_ns()
+        self._epoch_ns = self.start_ns   # moves forward on a slip
+        self._epoch_samples = 0
+        self.samples = 0
+        self.packets = 0
+        self.ticks = 0
+        self.late_ticks = 0
+        self.max_lag_ns_seen = 0
+        self.slips = 0
+
+    def deadline_ns(self):
+        return self._epoch_ns + int((self.samples - self._epoch_samples) * self._ns_per_sample)
+
+    def wait(self):
+        """Block until the next burst is due."""
+        self.ticks += 1
+        deadline = self.deadline_ns()
+        now = time.monotonic_ns()
+        lag = now - deadline
+
+        if lag >= 0:
+            if lag > 0:
+                self.late_ticks += 1
+                self.max_lag_ns_seen = max(self.max_lag_ns_seen, lag)
+            if lag > self.max_lag_ns:
+                self.slips += 1
+                self._epoch_ns = now
+                self._epoch_samples = self.samples
+            return
+
+        remaining = -lag
+        if remaining > self.spin_ns:
+            time.sleep((remaining - self.spin_ns) / 1e9)
+        while time.monotonic_ns() < deadline:
+            pass
+
+    def advance(self, samples, packets=1):
+        self.samples += samples
+        self.packets += packets
+
+    def report(self):
+        # The last burst occupies the line until its successor's deadline
+        elapsed = (max(time.monotonic_ns(), self.deadline_ns()) - self.start_ns) / 1e9
+        actual = self.samples / elapsed if elapsed > 0 else 0.0
+        return {
+            "requested_rate": self.sample_rate,
+            "actual_rate": actual,
+            "rate_ratio": actual / self.sample_rate,
+            "elapsed_s": elapsed,
+            "samples": self.samples,
+            "packets": self.packets,
+            "ticks": self.ticks,
+            "late_ticks": self.late_ticks,
+            "max_lag_us": self.max_lag_ns_seen / 1e3,
+            "slips": self.slips,
+        }
+
+
+def send_paced(sock, address, encoder, blocks, sample_rate, burst_packets=8, pacer=None):
+    """Frame and send an iterable of complex64 blocks at ``sample_rate`` samples/sec.
+
+    Packets go out in bursts of ``burst_packets`` back-to-back ``sendto`` calls
+    per pacing tick; Python has no ``sendmmsg`` binding, so batching the
+    sends per deadline is what keeps the per-packet wait overhead down at
+    high rates. Returns the pacer's throughput report.
+    """
+    pacer = RatePacer(sample_rate) if pacer is None else pacer
+    pacer.start()
+    in_burst = 0
+    for block in blocks:
+        for frame in encoder.frames(block):
+            if in_burst == 0:
+                pacer.wait()
+            sock.sendto(frame, address)
+            pacer.advance((len(frame) - encoder.header_size) // SAMPLE_BYTES)
+            in_burst = (in_burst + 1) % burst_packets
+    return pacer.report()
+
+
+if __name__ == "__main__":
+    # Load test: stream a CW tone at a fixed sample rate and report achieved throughput
+    parser = argparse.ArgumentParser(description="Send paced, framed IQ packets to load-test a receiver.")
+    parser.add_argument("--ip", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--rate", type=float, default=1e6, help="samples per second")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds")
+    parser.add_argument("--packet-size", type=int, default=1472)
+    parser.add_argument("--burst", type=int, default=8, help="packets per pacing tick")
+    args = parser.parse_args()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    encoder = PacketEncoder(args.packet_size)
+
+    # One source block per pacing tick
+    source = ToneSource(args.rate / 100, args.rate, block_size=encoder.samples_per_packet * args.burst)
+
+    report = send_paced(sock, (args.ip, args.port), encoder, source.take(args.duration), args.rate, args.burst)
+    for key, value in report.items():
+        print(f"{key}: {value}")
+    sock.close()
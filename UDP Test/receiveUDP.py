@@ -1,22 +1,36 @@
+import argparse
 import socket
 import numpy as np
 import matplotlib.pyplot as plt
-import struct
+from iqReceiver import open_receiver
+from ingestPipeline import IngestPipeline, decimate_for_display
+
+# The stream is either framed packets (sendUDP.py, radarSimulator.py: a 32-byte
+# header, then complex float32 samples of 8 bytes each) or, with --raw, bare
+# complex float32 samples as a GNU Radio UDP Sink sends them
+parser = argparse.ArgumentParser(description="Plot the live UDP IQ stream.")
+parser.add_argument("--ip", default="127.0.0.1", help="local address to listen on")
+parser.add_argument("--port", type=int, default=8080)
+parser.add_argument("--packet-size", type=int, default=1472, help="datagram size in bytes")
+parser.add_argument("--raw", action="store_true", help="unframed samples, e.g. from GNU Radio")
+args = parser.parse_args()
 
 # Define UDP parameters
-udp_ip = "127.0.0.1"  # Local IP address (change if sending to another device)
-udp_port = 8080       # Port on which GNU Radio is sending data
-packet_size = 1472    # Packet size in bytes (for complex float32, each sample is 8 bytes)
+udp_ip = args.ip
+udp_port = args.port
+packet_size = args.packet_size
 timeout = 5           # Timeout in seconds
+display_points = 1024  # Points per trace; longer blocks are decimated to fit
+frame_rate = 20       # Plot refreshes per second, independent of the packet rate
 
-# Create a UDP socket
-sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-sock.bind((udp_ip, udp_port))
+# Create a UDP socket that writes packets straight into a preallocated ring buffer
+receiver = open_receiver(udp_ip, udp_port, timeout=timeout, packet_size=packet_size, framed=not args.raw)
+sock = receiver.sock
 
-# Set socket timeout
-sock.settimeout(timeout)
+# Receive on a background thread so plotting never blocks the socket
+pipeline = IngestPipeline(receiver, max_blocks=64)
 
-print(f"Listening for UDP packets on {udp_ip}:{udp_port}...")
+print(f"Listening for {'raw' if args.raw else 'framed'} UDP packets on {udp_ip}:{udp_port}...")
 
 # Initialize live plot
 plt.ion()  # Turn on interactive mode
@@ -28,49 +42,49 @@ ax[0].set_title("Real Part of Signal")
 ax[1].set_title("Imaginary Part of Signal")
 
 for a in ax:
-    a.set_xlim(0, 1024)  # Display first 1024 samples
+    a.set_xlabel("Sample in block")
     a.set_ylim(-1, 1)
     a.legend()
     a.grid()
 
-# Function to process the received data and convert it to complex numbers
-def process_data(data):
-    # Convert the byte data to a numpy array of floats (single precision, i.e., float32)
-    iq_data = np.frombuffer(data, dtype=np.float32)
-    
-    # Reconstruct complex signal (real + j*imaginary)
-    complex_signal = iq_data[0::2] + 1j * iq_data[1::2]
-    
-    return complex_signal
-
 try:
+    pipeline.start()
     while True:
-        # Receive data from the UDP socket
-        data, addr = sock.recvfrom(packet_size * 4)  # Receive packet (4 times packet_size for complex float32)
+        # Take only the newest block; anything older is skipped for display
+        block = pipeline.get_latest()
+
+        if block is None:
+            if pipeline.error is not None:
+                raise pipeline.error
+            if pipeline.idle_time > timeout:
+                raise socket.timeout()
+            plt.pause(1 / frame_rate)
+            continue
 
-        if data:
-            # Process the received data into complex numbers
-            complex_signal = process_data(data)
+        # Show the whole block, decimated so a redraw costs the same however many packets it holds
+        complex_signal, step = decimate_for_display(block, display_points)
 
-            # Display the received signal in the terminal (first 10 samples)
-            print("Received packet:")
-            print("First 10 samples:")
-            print(complex_signal[:10])  # Display first 10 complex samples
-            print("")
+        # Display the received signal in the terminal (first 10 samples)
+        print("Pipeline:", pipeline.stats())
+        print("First 10 samples:")
+        print(block[:10])  # Display first 10 complex samples
+        print("")
 
-            # Update the live plot
-            x_vals = np.arange(len(complex_signal))  # X-axis values
+        # Update the live plot
+        x_vals = np.arange(len(complex_signal)) * step  # X-axis values, in samples of the block
 
-            line1.set_xdata(x_vals)
-            line1.set_ydata(complex_signal.real)
+        line1.set_xdata(x_vals)
+        line1.set_ydata(complex_signal.real)
 
-            line2.set_xdata(x_vals)
-            line2.set_ydata(complex_signal.imag)
+        line2.set_xdata(x_vals)
+        line2.set_ydata(complex_signal.imag)
 
-            ax[0].set_ylim(complex_signal.real.min(), complex_signal.real.max())
-            ax[1].set_ylim(complex_signal.imag.min(), complex_signal.imag.max())
+        for a in ax:
+            a.set_xlim(0, max(1, len(block) - 1))
+        ax[0].set_ylim(complex_signal.real.min(), complex_signal.real.max())
+        ax[1].set_ylim(complex_signal.imag.min(), complex_signal.imag.max())
 
-            plt.pause(0.01)  # Pause to update the plot
+        plt.pause(1 / frame_rate)  # Redraw at the display frame rate
 
 except socket.timeout:
     print(f"Timeout reached after {timeout} seconds. No data received.")
@@ -78,7 +92,9 @@ except KeyboardInterrupt:
     print("Exiting...")
 
 finally:
-    # Close the socket when done
+    # Stop ingest and close the socket when done
+    pipeline.stop()
+    print("Pipeline stats:", pipeline.stats())
     sock.close()
     plt.ioff()  # Turn off interactive mode
     plt.show()  # Show the final plot
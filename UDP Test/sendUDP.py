@@ -1,10 +1,18 @@
+import argparse
 import socket
-import numpy as np
-import time
+from packetFraming import PacketEncoder, RawEncoder
+from ratePacer import send_paced
+from signalSources import ToneSource
+
+# Framed packets for receiveUDP.py by default; --raw sends bare samples for
+# a GNU Radio UDP Source (or receiveUDP.py --raw)
+parser = argparse.ArgumentParser(description="Send a complex sine wave as UDP IQ packets.")
+parser.add_argument("--raw", action="store_true", help="no packet header, e.g. for GNU Radio")
+args = parser.parse_args()
 
 # Define UDP target
 UDP_IP = "127.0.0.1"  # Change if sending to another device
-UDP_PORT = 8080       # GNU Radio listening port
+UDP_PORT = 8080       # Receiver listening port
 PACKET_SIZE = 1472    # Packet size in bytes
 
 # Create UDP socket
@@ -13,22 +21,21 @@ sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
 # Complex sine wave parameters
 fs = 1000  # Sampling frequency in Hz
 f = 5      # Sine wave frequency in Hz
-duration = 2  # Duration in seconds
-t = np.linspace(0, duration, int(fs * duration), endpoint=False)
+duration = 2  # Duration in seconds (None streams until interrupted)
 
-# Generate complex sine wave (I/Q data)
-complex_wave = np.exp(1j * 2 * np.pi * f * t).astype(np.complex64)  # float32 complex
+# Stream the complex sine wave (I/Q data) in fixed-size blocks instead of
+# building the whole waveform up front
+source = ToneSource(f, fs, block_size=1024)
+blocks = source if duration is None else source.take(duration)
 
-# Convert to bytes
-iq_bytes = complex_wave.tobytes()
+# Frame the samples into numbered, timestamped packets of at most 1472 bytes
+encoder = RawEncoder(PACKET_SIZE) if args.raw else PacketEncoder(PACKET_SIZE)
 
-# Send packets in chunks of 1472 bytes
-for i in range(0, len(iq_bytes), PACKET_SIZE):
-    packet = iq_bytes[i:i+PACKET_SIZE]
-    sock.sendto(packet, (UDP_IP, UDP_PORT))
-    time.sleep((1 / fs) * (PACKET_SIZE // 8))  # Control transmission rate
+# Send on a monotonic deadline so the average rate matches fs
+report = send_paced(sock, (UDP_IP, UDP_PORT), encoder, blocks, fs, burst_packets=1)
 
-print("Complex sine wave packets sent to GNU Radio.")
+print(f"Complex sine wave sent as {'raw' if args.raw else 'framed'} packets to {UDP_IP}:{UDP_PORT}.")
+print(f"Requested {report['requested_rate']:.0f} S/s, achieved {report['actual_rate']:.0f} S/s")
 
 # Close socket
 sock.close()
@@ -0,0 +1,158 @@
+import itertools
+import numpy as np
+from chirpWaveform import pulse
+
+# Streaming IQ sources for the sender. Each source is an iterable that yields
+# fixed-size complex64 blocks forever (file replay can optionally stop at the
+# end of the file). Blocks are written into one preallocated buffer per
+# source, so memory stays constant however long the stream runs; a yielded
+# block is only valid until the next one is requested.
+
+
+class SignalSource:
+    def __init__(self, fs, block_size=4096):
+        self.fs = fs
+        self.block_size = block_size
+        self.position = 0  # samples produced so far
+        self._block = np.zeros(block_size, dtype=np.complex64)
+
+    def fill(self, out):
+        # Write the next len(out) samples into out
+        raise NotImplementedError
+
+    def __iter__(self):
+        while True:
+            self.fill(self._block)
+            self.position += self.block_size
+            yield self._block
+
+    def take(self, seconds):
+        """Yield just enough blocks to cover ``seconds`` of signal."""
+        return itertools.islice(self, -(-int(seconds * self.fs) // self.block_size))
+
+
+class ToneSource(SignalSource):
+    """Continuous-wave complex tone at ``freq`` Hz, phase-continuous across blocks."""
+
+    def __init__(self, freq, fs, block_size=4096, amplitude=1.0):
+        super().__init__(fs, block_size)
+        self.freq = freq
+        self.amplitude = amplitude
+        self._step = 2 * np.pi * freq / fs
+        self._ramp = self._step * np.arange(block_size)
+        self._phase = np.zeros(block_size)
+        self._phase0 = 0.0
+
+    def fill(self, out):
+        np.add(self._ramp, self._phase0, out=self._phase)
+        np.cos(self._phase, out=out.real)
+        np.sin(self._phase, out=out.imag)
+        if self.amplitude != 1.0:
+            out *= self.amplitude
+        # Keep the accumulated phase small so precision does not degrade over long runs
+        self._phase0 = (self._phase0 + self._step * len(out)) % (2 * np.pi)
+
+
+class ChirpSource(SignalSource):
+    """Linear chirp followed by a null, looped as in ``ChirpSignal.txLoopChirp``.
+
+    Defaults follow ``MatLab/ChirpSignal.m``: the sample rate is 20 times the
+    end frequency, the chirp spans ``0:1/fs:duration`` inclusive and the null
+    is as long as the chirp (``duty_cycle=0.5``). Set ``real=True`` for the
+    real-valued ``chirp()`` output the MATLAB class uses today; the default is
+    the complex analytic chirp. Blocks are gathered from the one cached pulse
+    period, so no phase is recomputed while streaming.
+    """
+
+    def __init__(self, f_start, f_end, duration, fs=None, block_size=4096, amplitude=1.0, real=False,
+                 duty_cycle=0.5):
+        fs = 20 * f_end if fs is None else fs
+        super().__init__(fs, block_size)
+        self.f_start = f_start
+        self.f_end = f_end
+        self.duration = duration
+        self.amplitude = amplitude
+        self.real = real
+
+        self.chirp_length = int(round(duration * fs)) + 1
+        self.pulse = pulse(f_start, f_end, duration, fs, duty_cycle, real)
+        self.period = len(self.pulse)  # chirp then null
+
+        self._offsets = np.arange(block_size)
+        self._index = np.zeros(block_size, dtype=np.int64)
+
+    def fill(self, out):
+        n = len(out)
+        index = self._index[:n]
+        np.add(self._offsets[:n], self.position % self.period, out=index)
+        np.remainder(index, self.period, out=index)
+        np.take(self.pulse, index, out=out)
+        if self.amplitude != 1.0:
+            out *= self.amplitude
+
+
+class NoiseSource(SignalSource):
+    """Circular complex white Gaussian noise with total power ``power``."""
+
+    def __init__(self, fs, block_size=4096, power=1.0, seed=None):
+        super().__init__(fs, block_size)
+        self.scale = np.float32(np.sqrt(power / 2))
+        self.rng = np.random.default_rng(seed)
+
+    def fill(self, out):
+        # complex64 is two float32s, so draw I and Q straight into the output
+        iq = out.view(np.float32)
+        self.rng.standard_normal(dtype=np.float32, out=iq)
+        iq *= self.scale
+
+
+class FileSource(SignalSource):
+    """Replay a headerless complex64 dump (such as ``gnuFileDump/gnuIQRx.exe``).
+
+    The file is memory-mapped, so only the block being sent is paged in. With
+    ``loop=True`` playback wraps to the start forever; otherwise the last
+    block is zero-padded and iteration stops.
+    """
+
+    def __init__(self, file_path, fs, block_size=4096, loop=True, offset=0):
+        super().__init__(fs, block_size)
+        self.data = np.memmap(file_path, dtype=np.complex64, mode="r", offset=offset)
+        if len(self.data) == 0:
+            raise ValueError(f"{file_path} contains no samples")
+        self.loop = loop
+
+    def fill(self, out):
+        filled = 0
+        while filled < len(out):
+            start = (self.position + filled) % len(self.data) if self.loop else self.position + filled
+            chunk = self.data[start:start + len(out) - filled]
+            if len(chunk) == 0:
+                out[filled:] = 0
+                break
+            out[filled:filled + len(chunk)] = chunk
+            filled += len(chunk)
+        return filled
+
+    def __iter__(self):
+        while self.loop or self.position < len(self.data):
+            self.fill(self._block)
+            self.position += self.block_size
+            yield self._block
+
+
+class MixSource(SignalSource):
+    """Sum of several sources sharing a sample rate and block size, e.g. a chirp plus noise."""
+
+    def __init__(self, *sources):
+        super().__init__(sources[0].fs, sources[0].block_size)
+        if any(s.fs != self.fs or s.block_size != self.block_size for s in sources):
+            raise ValueError("mixed sources must share fs and block_size")
+        self.sources = sources
+        self._scratch = np.zeros(self.block_size, dtype=np.complex64)
+
+    def fill(self, out):
+        out[:] = 0
+        for source in self.sources:
+            source.fill(self._scratch[:len(out)])
+            source.position += len(out)
+            out += self._scratch[:len(out)]
@@ -0,0 +1,225 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from numpy.lib.format import open_memmap
+from numpy.lib.stride_tricks import sliding_window_view
+import dspCache
+
+# Short-time Fourier transform for captures and live streams, the Python
+# counterpart of pspectrum(..., "spectrogram") in ChirpSignal.plotSignal.
+# Frames are strided views over the samples (no per-frame copies), windowed
+# and transformed in batches, and rows are written out as they are produced,
+# so a spectrogram of a capture larger than RAM can go straight into a
+# memory-mapped .npy file. Long captures can be split by time segment over a
+# process pool; workers open the capture and the output file themselves, so
+# only paths and frame ranges are sent to them.
+
+WINDOWS = sorted(name for name in dspCache.WINDOWS if name != "kaiser")
+
+
+def make_window(window, size):
+    if isinstance(window, str):
+        return dspCache.window(window, size)
+    window = np.asarray(window, dtype=np.float32)
+    if len(window) != size:
+        raise ValueError("window length must equal fft_size")
+    return window
+
+
+class StftEngine:
+    """Spectrogram rows (fftshifted, DC in the middle) from blocks or whole captures.
+
+    ``hop`` is the frame advance in samples (``overlap = fft_size - hop``;
+    pass either). Rows are float32 power in dB, or linear power with
+    ``db=False``. ``batch`` frames are transformed per FFT call, which bounds
+    the temporary memory to about ``batch * fft_size`` complex samples.
+    """
+
+    def __init__(self, fft_size=1024, hop=None, overlap=None, window="hann", fs=1.0, center_freq=0.0,
+                 batch=256, db=True):
+        if hop is None:
+            hop = fft_size - overlap if overlap is not None else fft_size // 2
+        if not 0 < hop <= fft_size:
+            raise ValueError("hop must be between 1 and fft_size (overlap between 0 and fft_size - 1)")
+        self.fft_size = fft_size
+        self.hop = hop
+        self.window = make_window(window, fft_size)
+        self.fs = fs
+        self.center_freq = center_freq
+        self.batch = batch
+        self.db = db
+        # Power of a full-scale tone comes out as 0 dB whatever the window
+        self._scale = np.float32(1.0 / float(self.window.sum()) ** 2)
+        self._history = np.zeros(0, dtype=np.complex64)
+        self.frames = 0  # frames produced by process()
+
+    @property
+    def overlap(self):
+        return self.fft_size - self.hop
+
+    def frequencies(self):
+        return self.center_freq + np.fft.fftshift(np.fft.fftfreq(self.fft_size, 1 / self.fs))
+
+    def frame_times(self, first, count):
+        """Centre time in seconds of frames ``first .. first + count - 1``."""
+        return ((first + np.arange(count)) * self.hop + self.fft_size / 2) / self.fs
+
+    def frame_count(self, samples):
+        return 0 if samples < self.fft_size else (samples - self.fft_size) // self.hop + 1
+
+    def transform(self, frames, out=None):
+        """Rows for a (frames x fft_size) array or strided view, one batched FFT."""
+        spectra = dspCache.fft(frames * self.window)
+        power = spectra.real ** 2
+        power += spectra.imag ** 2
+        power *= self._scale
+        if self.db:
+            np.log10(np.maximum(power, 1e-20, out=power), out=power)
+            power *= 10
+        rows = np.fft.fftshift(power, axes=-1).astype(np.float32, copy=False)
+        if out is None:
+            return rows
+        out[:] = rows
+        return out
+
+    def frames_of(self, samples):
+        """Zero-copy strided (frames x fft_size) view of every full frame in ``samples``."""
+        return sliding_window_view(samples, self.fft_size)[::self.hop]
+
+    def rows(self, samples, first=0, count=None):
+        """Yield ``(frame index, rows)`` batches for frames of an in-memory or memory-mapped array."""
+        frames = self.frames_of(samples)
+        stop = len(frames) if count is None else min(len(frames), first + count)
+        for k in range(first, stop, self.batch):
+            yield k, self.transform(frames[k:min(k + self.batch, stop)])
+
+    # --- streaming ------------------------------------------------------
+
+    def process(self, block):
+        """Rows for every frame completed by ``block``; keeps the partial frame for the next call."""
+        data = np.concatenate([self._history, np.asarray(block, dtype=np.complex64)])
+        count = self.frame_count(len(data))
+        if count == 0:
+            self._history = data
+            return np.zeros((0, self.fft_size), dtype=np.float32)
+        rows = np.concatenate([r for _, r in self.rows(data)])
+        self._history = data[count * self.hop:].copy()
+        self.frames += count
+        return rows
+
+    def stream(self, blocks):
+        """Yield row batches for an iterable of blocks (a SignalSource, pipeline blocks, ...)."""
+        for block in blocks:
+            rows = self.process(block)
+            if len(rows):
+                yield rows
+
+    def reset(self):
+        self._history = np.zeros(0, dtype=np.complex64)
+        self.frames = 0
+
+
+def open_samples(path, dtype=np.complex64, offset=0):
+    """complex64 samples of a capture: a SigMF-style recording or a headerless dump."""
+    if path.endswith(".sigmf-meta"):
+        from captureFormat import CaptureFile
+        return CaptureFile(path)
+    return np.memmap(path, dtype=dtype, mode="r", offset=offset)
+
+
+def _span(samples, start, stop):
+    # Memory maps and arrays slice lazily; recordings dequantize the span once
+    if isinstance(samples, np.ndarray):
+        return samples[start:stop]
+    return samples.read(start, stop)
+
+
+def spectrogram(samples, engine, out=None, first=0, count=None):
+    """Spectrogram of ``samples`` (array, memmap or CaptureFile), written into ``out`` row by row.
+
+    ``out`` may be an ``open_memmap`` file for results larger than RAM; by
+    default an array is allocated. Frames ``first .. first + count`` are
+    computed, reading one batch-sized span of samples at a time.
+    """
+    total = engine.frame_count(len(samples))
+    count = total - first if count is None else min(count, total - first)
+    if out is None:
+        out = np.zeros((count, engine.fft_size), dtype=np.float32)
+    span_frames = engine.batch
+    for k in range(first, first + count, span_frames):
+        n = min(span_frames, first + count - k)
+        start = k * engine.hop
+        span = _span(samples, start, start + (n - 1) * engine.hop + engine.fft_size)
+        engine.transform(engine.frames_of(span)[:n], out=out[k - first:k - first + n])
+    return out
+
+
+def _segment_task(args):
+    path, dtype, offset, out_path, first, count, params = args
+    samples = open_samples(path, dtype, offset)
+    out = open_memmap(out_path, mode="r+")
+    spectrogram(samples, StftEngine(**params), out=out[first:first + count], first=first, count=count)
+    out.flush()
+    return count
+
+
+def spectrogram_to_file(path, out_path, workers=None, segment_frames=4096, dtype=np.complex64, offset=0,
+                        **params):
+    """Spectrogram of the capture at ``path`` into the .npy file ``out_path``.
+
+    The frame range is split into segments of ``segment_frames`` that run on
+    ``workers`` processes (``1`` runs in-process); each writes its own rows
+    of the shared output file. Returns the output as a read-only memmap.
+    """
+    engine = StftEngine(**params)
+    frames = engine.frame_count(len(open_samples(path, dtype, offset)))
+    out = open_memmap(out_path, mode="w+", dtype=np.float32, shape=(frames, engine.fft_size))
+    del out  # workers reopen it; the header is on disk
+
+    tasks = [(path, dtype, offset, out_path, first, min(segment_frames, frames - first), params)
+             for first in range(0, frames, segment_frames)]
+    workers = os.cpu_count() if workers is None else workers
+    if workers <= 1 or len(tasks) == 1:
+        for task in tasks:
+            _segment_task(task)
+    else:
+        # One FFT thread per worker process; the pool already uses every core
+        with ProcessPoolExecutor(max_workers=workers, initializer=dspCache.set_workers, initargs=(1,)) as pool:
+            list(pool.map(_segment_task, tasks))
+    return np.load(out_path, mmap_mode="r")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Spectrogram of an IQ capture, computed out of core.")
+    parser.add_argument("capture", help="headerless complex64 dump or .sigmf-meta recording")
+    parser.add_argument("output", help=".npy file for the spectrogram rows")
+    parser.add_argument("--fs", type=float, default=1.0)
+    parser.add_argument("--center-freq", type=float, default=0.0)
+    parser.add_argument("--fft-size", type=int, default=1024)
+    parser.add_argument("--hop", type=int, default=None)
+    parser.add_argument("--window", choices=WINDOWS, default="hann")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--plot", action="store_true")
+    args = parser.parse_args()
+
+    params = dict(fft_size=args.fft_size, hop=args.hop, window=args.window, fs=args.fs,
+                  center_freq=args.center_freq)
+    rows = spectrogram_to_file(args.capture, args.output, args.workers, **params)
+    print(f"{rows.shape[0]} frames x {rows.shape[1]} bins written to {args.output}")
+
+    if args.plot:
+        import matplotlib.pyplot as plt
+
+        # Peak-hold decimation in time keeps short pulses visible on screen
+        step = max(1, len(rows) // 2000)
+        image = rows[:len(rows) // step * step].reshape(-1, step, rows.shape[1]).max(axis=1)
+        engine = StftEngine(**params)
+        freqs = engine.frequencies()
+        extent = [freqs[0], freqs[-1], engine.frame_times(len(rows) - 1, 1)[0], engine.frame_times(0, 1)[0]]
+        plt.imshow(image, aspect="auto", extent=extent, cmap="viridis")
+        plt.xlabel("Frequency (Hz)")
+        plt.ylabel("Time (s)")
+        plt.colorbar(label="Power (dB)")
+        plt.show()
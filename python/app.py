@@ -1,16 +1,26 @@
 import threading
+import time
 import numpy as np
-from datetime import datetime
+from spsc_buffer import SpscRing
+from txrx_engine import TxRxEngine
+from txrx_timing import TxRxTiming, format_histogram, histogram
 
-def tx(i, signal):
-    current_time = datetime.now().strftime("%H:%M:%S.%f")  # Current time in HH:MM:SS.mmmmmm format
-    print(f"Txing at {current_time}: {signal[i]}")
 
-def rx(i, rxBuffer, lock):
-    current_time = datetime.now().strftime("%H:%M:%S.%f")  # Current time in HH:MM:SS.mmmmmm format
-    with lock:
-        rxBuffer.append(1)  # Append to shared list safely
-    print(f"Rxing at {current_time}: {rxBuffer}")
+def consume(ring, out, done):
+    # Processing side of the rx path: reads zero-copy views, never locks
+    filled = 0
+    while filled < len(out):
+        view = ring.read_view()
+        if len(view):
+            out[filled:filled + len(view)] = view
+            filled += len(view)
+            ring.release(len(view))
+        elif done.is_set() and ring.available() == 0:
+            break
+        else:
+            time.sleep(0.001)
+    return filled
+
 
 if __name__ == "__main__":
     # Define signal parameters
@@ -18,25 +28,32 @@ if __name__ == "__main__":
     period = 0.2
     sampling_rate = 100  # Sampling rate in Hz
     duration = 1  # Duration of the wave in seconds
+    block_size = 10  # Samples per scheduled TX/RX block
     t = np.linspace(0, duration, int(sampling_rate * duration), endpoint=False)
     signal = amplitude * np.sign(np.sin(2 * np.pi * t / period))
 
-    # Shared buffer and lock for synchronization
-    rxBuffer = []
-    lock = threading.Lock()  # Lock for synchronization
-    threads = []  # Store thread references
-
-    # Start all threads in parallel
-    for i in range(10):
-        t1 = threading.Thread(target=tx, args=(i, signal))
-        t2 = threading.Thread(target=rx, args=(i, rxBuffer, lock))
-        t1.start()
-        t2.start()
-        threads.append(t1)
-        threads.append(t2)
+    # TX and RX run on a fixed two-worker pool; block k is sent at
+    # k * block_size / sampling_rate and received into a bounded SPSC ring
+    # that the consumer thread drains
+    ring = SpscRing(4 * block_size, block_size)
+    timing = TxRxTiming(sampling_rate)
+    engine = TxRxEngine(signal, sampling_rate, block_size=block_size, rx_ring=ring, timing=timing)
+    rxBuffer = np.zeros(len(signal), dtype=np.complex64)
+    done = threading.Event()
+    consumer = threading.Thread(target=consume, args=(ring, rxBuffer, done))
+    consumer.start()
+    stats = engine.run()
+    done.set()
+    consumer.join()
 
-    # Wait for all threads to complete
-    for t in threads:
-        t.join()
+    print(f"Received {stats['rx_blocks'] * block_size} samples in {stats['elapsed_s']:.3f} s "
+          f"({stats['tx_late_blocks']} late TX blocks, {stats['rx_late_blocks']} late RX blocks, "
+          f"{stats['rx_dropped_blocks']} dropped)")
+    print(f"Final rxBuffer: {rxBuffer.real}")
 
-    print(f"Final rxBuffer: {rxBuffer}")  # Print the final shared buffer
+    # Every block is stamped with its first sample and the monotonic clock;
+    # RX block n is received one block period after TX block n is sent
+    report = timing.report()
+    print(f"TX->RX latency over {report['blocks']} blocks: p50 {report['latency_p50_us']:.1f} us, "
+          f"p99 {report['latency_p99_us']:.1f} us; RX jitter std {report['rx_jitter_std_us']:.1f} us")
+    print(format_histogram(*histogram(timing.latency_ns(), bins=10)))
@@ -0,0 +1,45 @@
+import argparse
+import numpy as np
+from txrx_engine import TxRxEngine
+from txrx_timing import TxRxTiming
+
+# Benchmark for the TX/RX engine: first runs the schedule unpaced to find the
+# highest sample rate the engine can move, then runs it paced at each target
+# rate. A rate is sustained when the paced run finishes on schedule and fewer
+# than 5% of blocks start more than one block period after their deadline
+# (occasional misses are scheduler jitter; a steady stream means the engine
+# is behind).
+#
+#   python benchmark_txrx.py --rates 1e6 10e6 50e6 --block-size 4096 --seconds 2
+
+
+def run(sample_rate, block_size, seconds, paced):
+    blocks = max(1, int(seconds * sample_rate / block_size))
+    t = np.arange(block_size * 16) / sample_rate
+    signal = np.exp(2j * np.pi * (sample_rate / 16) * t)
+    timing = TxRxTiming(sample_rate, capacity=min(blocks, 1 << 16))
+    engine = TxRxEngine(signal, sample_rate, block_size=block_size, blocks=blocks,
+                        rx_capacity=block_size * 256, loopback_delay=block_size // 2, timing=timing)
+    stats = engine.run(paced=paced)
+    stats.update(timing.report())
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the sample rates the TX/RX engine sustains.")
+    parser.add_argument("--rates", nargs="+", type=float, default=[1e6, 5e6, 10e6, 25e6, 50e6])
+    parser.add_argument("--block-size", type=int, default=4096)
+    parser.add_argument("--seconds", type=float, default=2.0, help="length of each paced run")
+    args = parser.parse_args()
+
+    ceiling = run(max(args.rates), args.block_size, args.seconds, paced=False)
+    print(f"Unpaced ceiling: {ceiling['achieved_rate'] / 1e6:.1f} MS/s with {args.block_size}-sample blocks")
+
+    print(f"{'target MS/s':>12}{'achieved':>10}{'missed %':>10}{'max lag us':>12}{'p99 tx->rx us':>15}  result")
+    for rate in args.rates:
+        r = run(rate, args.block_size, args.seconds, paced=True)
+        missed = (r["tx_late_blocks"] + r["rx_late_blocks"]) / (r["tx_blocks"] + r["rx_blocks"])
+        lag = max(r["max_tx_lag_us"], r["max_rx_lag_us"])
+        sustained = r["achieved_rate"] >= 0.99 * rate and missed < 0.05
+        print(f"{rate / 1e6:>12.1f}{r['achieved_rate'] / 1e6:>10.1f}{missed * 100:>10.2f}{lag:>12.0f}{r['latency_p99_us']:>15.0f}"
+              f"  {'sustained' if sustained else 'falling behind'}")
@@ -0,0 +1,205 @@
+import mmap
+import os
+import platform
+import tempfile
+import uuid
+import numpy as np
+
+# Single-producer/single-consumer sample ring.
+#
+# Samples live in a NumPy array; the producer owns `head` and the consumer
+# owns `tail`, both free-running uint64 sample counters that never wrap. Each
+# side only ever stores to its own counter, and only after the data it covers
+# is in place, so neither side takes a lock: an aligned 8-byte store is
+# atomic, and the data must become visible before the counter that
+# publishes it. Between threads the GIL guarantees that. Between processes
+# nothing in this code issues a memory barrier, so it relies on the CPU
+# keeping stores (and loads) in program order: x86's total store order
+# does, weakly ordered CPUs such as ARM do not. `shared()` and `attach()`
+# therefore refuse to run on anything but x86.
+#
+# Writes are block-granular: the capacity is a whole number of blocks, so a
+# block never straddles the end of the array and the producer can receive
+# straight into `write_block()`. Reads hand out zero-copy views.
+#
+# The header and data can sit in any writable buffer. `SpscRing.shared()`
+# puts them in a memory-mapped file that a second process opens with
+# `SpscRing.attach(path)` (or inherits across fork with `path=None`).
+
+_HEADER = 256           # bytes before the samples
+_META = 0               # word 0 capacity, 1 block size, 2..3 dtype string
+_HEAD = 8               # word index of head, on its own 64-byte cache line
+_TAIL = 16              # word index of tail, on its own 64-byte cache line
+MAGIC = 0x53505343      # "SPSC", in word 4
+TSO_MACHINES = {"x86_64", "amd64", "i386", "i486", "i586", "i686", "x86"}
+
+
+def _require_tso():
+    machine = platform.machine()
+    if machine.lower() not in TSO_MACHINES:
+        raise RuntimeError(f"a cross-process SpscRing needs x86 store ordering; this machine is {machine!r}")
+
+
+class SpscRing:
+    def __init__(self, capacity, block_size=1, dtype=np.complex64, buffer=None):
+        dtype = np.dtype(dtype)
+        if capacity <= 0 or capacity % block_size:
+            raise ValueError("capacity must be a positive whole number of blocks")
+        size = self.nbytes(capacity, dtype)
+        if buffer is None:
+            buffer = bytearray(size)
+        elif len(memoryview(buffer).cast("B")) < size:
+            raise ValueError(f"buffer is smaller than the {size} bytes the ring needs")
+
+        self.capacity = capacity
+        self.block_size = block_size
+        self.dtype = dtype
+        self.buffer = buffer
+        self._words = np.frombuffer(buffer, dtype=np.uint64, count=_HEADER // 8)
+        self.data = np.frombuffer(buffer, dtype=dtype, count=capacity, offset=_HEADER)
+        self.dropped_blocks = 0  # producer side: blocks refused because the ring was full
+
+    @staticmethod
+    def nbytes(capacity, dtype=np.complex64):
+        return _HEADER + capacity * np.dtype(dtype).itemsize
+
+    def _init_header(self):
+        code = self.dtype.str.encode().ljust(16, b"\0")
+        self._words[0] = self.capacity
+        self._words[1] = self.block_size
+        self._words[2:4] = np.frombuffer(code, dtype=np.uint64)
+        self._words[4] = MAGIC
+        self._words[_HEAD] = 0
+        self._words[_TAIL] = 0
+
+    # --- shared memory --------------------------------------------------
+
+    @classmethod
+    def shared(cls, capacity, block_size=1, dtype=np.complex64, path=None):
+        """Create a ring in shared memory.
+
+        With ``path`` the ring is a file (``/dev/shm`` where available) that
+        another process opens with ``attach(path)``; without it the mapping is
+        anonymous and shared only with children forked after this call.
+        x86 only (see the module comment).
+        """
+        _require_tso()
+        size = cls.nbytes(capacity, dtype)
+        if path is None:
+            buffer = mmap.mmap(-1, size)
+        else:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600)
+            try:
+                os.ftruncate(fd, size)
+                buffer = mmap.mmap(fd, size)
+            finally:
+                os.close(fd)
+        ring = cls(capacity, block_size, dtype, buffer)
+        ring.path = path
+        ring._init_header()
+        return ring
+
+    @classmethod
+    def attach(cls, path):
+        """Open a ring another process created with ``shared(path=...)``."""
+        _require_tso()
+        fd = os.open(path, os.O_RDWR)
+        try:
+            buffer = mmap.mmap(fd, os.fstat(fd).st_size)
+        finally:
+            os.close(fd)
+        words = np.frombuffer(buffer, dtype=np.uint64, count=_HEADER // 8)
+        if words[4] != MAGIC:
+            raise ValueError(f"{path} is not an SPSC ring")
+        dtype = np.dtype(words[2:4].tobytes().rstrip(b"\0").decode())
+        ring = cls(int(words[0]), int(words[1]), dtype, buffer)
+        ring.path = path
+        return ring
+
+    def unlink(self):
+        path = getattr(self, "path", None)
+        if path and os.path.exists(path):
+            os.remove(path)
+
+    # --- counters -------------------------------------------------------
+
+    @property
+    def head(self):
+        return int(self._words[_HEAD])
+
+    @property
+    def tail(self):
+        return int(self._words[_TAIL])
+
+    def available(self):
+        """Samples written and not yet released by the consumer."""
+        return self.head - self.tail
+
+    def free(self):
+        return self.capacity - self.available()
+
+    # --- producer -------------------------------------------------------
+
+    def write_block(self):
+        """A writable view of the next block, or None when the ring is full.
+
+        Fill it, then publish it with ``commit_block()``.
+        """
+        head = self.head
+        if head - self.tail + self.block_size > self.capacity:
+            self.dropped_blocks += 1
+            return None
+        start = head % self.capacity
+        return self.data[start:start + self.block_size]
+
+    def commit_block(self):
+        self._words[_HEAD] = self.head + self.block_size
+
+    def write(self, samples):
+        """Copy whole blocks of ``samples`` in; returns the number of samples written."""
+        written = 0
+        for offset in range(0, len(samples) - self.block_size + 1, self.block_size):
+            out = self.write_block()
+            if out is None:
+                break
+            out[:] = samples[offset:offset + self.block_size]
+            self.commit_block()
+            written += self.block_size
+        return written
+
+    # --- consumer -------------------------------------------------------
+
+    def read_view(self, max_samples=None):
+        """A zero-copy view of the oldest unread samples.
+
+        The view stops at the end of the array, so a second call returns the
+        rest after a wrap. The samples stay valid until ``release()``.
+        """
+        tail = self.tail
+        count = self.head - tail
+        if max_samples is not None:
+            count = min(count, max_samples)
+        start = tail % self.capacity
+        return self.data[start:start + min(count, self.capacity - start)]
+
+    def release(self, count):
+        if count > self.available():
+            raise ValueError("cannot release more samples than are available")
+        self._words[_TAIL] = self.tail + count
+
+    def read(self, max_samples=None):
+        """Copy out and release up to ``max_samples`` of the oldest samples."""
+        count = self.available() if max_samples is None else min(max_samples, self.available())
+        out = np.empty(count, dtype=self.dtype)
+        filled = 0
+        while filled < count:
+            view = self.read_view(count - filled)
+            out[filled:filled + len(view)] = view
+            self.release(len(view))
+            filled += len(view)
+        return out
+
+
+def default_ring_path(name="sar_rx_ring"):
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, f"{name}_{uuid.uuid4().hex[:8]}")
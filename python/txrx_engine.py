@@ -0,0 +1,182 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# Block-scheduled TX/RX engine.
+#
+# The transmit signal is cut into fixed-size blocks; block k is due at
+# start + k * block_size / sample_rate on the monotonic clock. One long-lived
+# TX worker and one RX worker (a fixed pool, never a thread per sample) walk
+# the same schedule. The RX worker handles block k once it has fully elapsed
+# and writes it into a preallocated NumPy receive buffer.
+
+SPIN_NS = 200_000  # busy-wait the last 0.2 ms before a deadline instead of sleeping
+
+
+def wait_until(deadline_ns):
+    remaining = deadline_ns - time.monotonic_ns()
+    if remaining > SPIN_NS:
+        time.sleep((remaining - SPIN_NS) / 1e9)
+    while time.monotonic_ns() < deadline_ns:
+        time.sleep(0)  # yield the GIL so the other worker is not starved
+
+
+class TxRxEngine:
+    def __init__(self, signal, sample_rate, block_size=4096, blocks=None, rx_capacity=None,
+                 transmit=None, receive=None, loopback_delay=0, rx_ring=None,
+                 timing=None):
+        """
+        signal          samples to transmit; repeated cyclically when ``blocks`` needs more
+        sample_rate     samples per second the schedule runs at
+        blocks          number of blocks to run (default: one pass over the signal)
+        rx_capacity     receive buffer size in samples (default: everything received);
+                        when smaller, the buffer is used as a ring
+        transmit        callable(block_index, samples); default discards the samples
+        receive         callable(block_index, out) that fills ``out``; default is a
+                        loopback of the transmit signal delayed by ``loopback_delay``
+        rx_ring         an spsc_buffer.SpscRing with this block size; when given, received
+                        blocks go into the ring for a consumer thread or process to read
+                        (blocks that find it full are dropped and counted) instead of
+                        into ``rx_buffer``
+        timing          a txrx_timing.TxRxTiming that gets a monotonic stamp for every
+                        TX block (as it is handed to ``transmit``) and RX block (as
+                        ``receive`` returns it), keyed by the block's first sample
+        """
+        self.signal = np.asarray(signal, dtype=np.complex64)
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.blocks = -(-len(self.signal) // block_size) if blocks is None else blocks
+        total = self.blocks * block_size
+        capacity = total if rx_capacity is None else rx_capacity
+        if capacity % block_size:
+            raise ValueError("rx_capacity must be a whole number of blocks")
+        if rx_ring is not None and rx_ring.block_size != block_size:
+            raise ValueError("rx_ring block size must match the engine block size")
+        self.rx_ring = rx_ring
+        self.rx_buffer = np.zeros(capacity, dtype=np.complex64) if rx_ring is None else rx_ring.data
+        self.transmit = transmit or (lambda index, samples: None)
+        self.receive = receive or self._loopback
+        self.loopback_delay = loopback_delay
+        self.timing = timing
+
+        self._tx_block = np.zeros(block_size, dtype=np.complex64)
+        self._ns_per_block = block_size * 1e9 / sample_rate
+        self.start_ns = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.tx_blocks = 0
+        self.rx_blocks = 0
+        self.tx_late = 0
+        self.rx_late = 0
+        self.rx_dropped = 0
+        self.max_tx_lag_ns = 0
+        self.max_rx_lag_ns = 0
+        self.elapsed_ns = 0
+
+    def due_ns(self, block):
+        return self.start_ns + int(block * self._ns_per_block)
+
+    def tx_samples(self, block, out):
+        # Copy block `block` of the cyclically repeated signal into out
+        n = len(self.signal)
+        start = (block * self.block_size) % n
+        filled = 0
+        while filled < len(out):
+            chunk = self.signal[start:start + len(out) - filled]
+            out[filled:filled + len(chunk)] = chunk
+            filled += len(chunk)
+            start = 0
+        return out
+
+    def _loopback(self, block, out):
+        # Receive what was transmitted loopback_delay samples earlier
+        first = block * self.block_size - self.loopback_delay
+        if first + len(out) <= 0:
+            out[:] = 0
+            return
+        lead = max(0, -first)
+        out[:lead] = 0
+        n = len(self.signal)
+        pos, filled = (first + lead) % n, lead
+        while filled < len(out):
+            chunk = self.signal[pos:pos + len(out) - filled]
+            out[filled:filled + len(chunk)] = chunk
+            filled += len(chunk)
+            pos = 0
+
+    def rx_view(self, block):
+        start = (block * self.block_size) % len(self.rx_buffer)
+        return self.rx_buffer[start:start + self.block_size]
+
+    def _tx_loop(self, paced):
+        for block in range(self.blocks):
+            due = self.due_ns(block)
+            if paced:
+                wait_until(due)
+                lag = time.monotonic_ns() - due
+                if lag > self._ns_per_block:
+                    self.tx_late += 1
+                self.max_tx_lag_ns = max(self.max_tx_lag_ns, lag)
+            samples = self.tx_samples(block, self._tx_block)
+            if self.timing is not None:
+                self.timing.tx.stamp(block * self.block_size)
+            self.transmit(block, samples)
+            self.tx_blocks += 1
+
+    def _rx_loop(self, paced):
+        for block in range(self.blocks):
+            # A block can be received once its last sample time has passed
+            due = self.due_ns(block + 1)
+            if paced:
+                wait_until(due)
+                lag = time.monotonic_ns() - due
+                if lag > self._ns_per_block:
+                    self.rx_late += 1
+                self.max_rx_lag_ns = max(self.max_rx_lag_ns, lag)
+            if self.rx_ring is None:
+                self.receive(block, self.rx_view(block))
+            else:
+                out = self.rx_ring.write_block()
+                if out is None:
+                    self.rx_dropped += 1
+                    continue
+                self.receive(block, out)
+                self.rx_ring.commit_block()
+            if self.timing is not None:
+                self.timing.rx.stamp(block * self.block_size)
+            self.rx_blocks += 1
+
+    def run(self, paced=True):
+        """Run the whole schedule on a two-worker pool and return the stats.
+
+        ``paced=False`` runs both loops as fast as possible, which measures
+        the highest sample rate the engine could sustain.
+        """
+        self.reset_stats()
+        if self.timing is not None:
+            self.timing.reset()
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="txrx") as pool:
+            # Leave the workers a moment to start before block 0 is due
+            self.start_ns = time.monotonic_ns() + 1_000_000
+            futures = [pool.submit(self._tx_loop, paced), pool.submit(self._rx_loop, paced)]
+            for future in futures:
+                future.result()
+        self.elapsed_ns = time.monotonic_ns() - self.start_ns
+        return self.stats()
+
+    def stats(self):
+        elapsed = max(self.elapsed_ns, 1) / 1e9
+        samples = self.rx_blocks * self.block_size
+        return {
+            "sample_rate": self.sample_rate,
+            "achieved_rate": samples / elapsed,
+            "elapsed_s": elapsed,
+            "tx_blocks": self.tx_blocks,
+            "rx_blocks": self.rx_blocks,
+            "tx_late_blocks": self.tx_late,
+            "rx_late_blocks": self.rx_late,
+            "rx_dropped_blocks": self.rx_dropped,
+            "max_tx_lag_us": self.max_tx_lag_ns / 1e3,
+            "max_rx_lag_us": self.max_rx_lag_ns / 1e3,
+        }
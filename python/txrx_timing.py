@@ -0,0 +1,101 @@
+import time
+import numpy as np
+
+# TX/RX block timestamps on the monotonic clock.
+#
+# Every transmitted and received block is stamped with the sample counter of
+# its first sample and time.monotonic_ns(), stored in preallocated int64
+# arrays (a stamp is two array stores; nothing is formatted or allocated).
+# Matching TX and RX stamps by sample counter gives the TX->RX latency of each
+# block; comparing successive stamps against the sample clock gives the
+# scheduling jitter of each direction.
+
+
+class BlockClock:
+    """Stamp log for one direction; keeps the newest ``capacity`` stamps."""
+
+    def __init__(self, capacity=1 << 16):
+        self.capacity = capacity
+        self.sample = np.zeros(capacity, dtype=np.int64)
+        self.ns = np.zeros(capacity, dtype=np.int64)
+        self.count = 0
+
+    def stamp(self, sample_index, ns=None):
+        i = self.count % self.capacity
+        self.ns[i] = time.monotonic_ns() if ns is None else ns
+        self.sample[i] = sample_index
+        self.count += 1
+
+    def arrays(self):
+        """(sample counters, timestamps) of the retained stamps, oldest first."""
+        if self.count <= self.capacity:
+            return self.sample[:self.count], self.ns[:self.count]
+        split = self.count % self.capacity
+        return (np.concatenate((self.sample[split:], self.sample[:split])),
+                np.concatenate((self.ns[split:], self.ns[:split])))
+
+    def reset(self):
+        self.count = 0
+
+
+class TxRxTiming:
+    def __init__(self, sample_rate, capacity=1 << 16):
+        self.sample_rate = sample_rate
+        self.tx = BlockClock(capacity)
+        self.rx = BlockClock(capacity)
+
+    def reset(self):
+        self.tx.reset()
+        self.rx.reset()
+
+    def latency_ns(self, rx_offset=0):
+        """TX->RX latency of every block stamped in both directions.
+
+        RX block starting at sample ``n`` is matched with the TX block that
+        started at sample ``n - rx_offset`` (the known path delay in samples,
+        0 for a block-for-block loopback).
+        """
+        tx_sample, tx_ns = self.tx.arrays()
+        rx_sample, rx_ns = self.rx.arrays()
+        _, tx_index, rx_index = np.intersect1d(tx_sample, rx_sample - rx_offset,
+                                               assume_unique=True, return_indices=True)
+        return rx_ns[rx_index] - tx_ns[tx_index]
+
+    def jitter_ns(self, direction="rx"):
+        """Deviation of each stamp interval from the interval the sample clock predicts."""
+        sample, ns = (self.rx if direction == "rx" else self.tx).arrays()
+        if len(ns) < 2:
+            return np.zeros(0, dtype=np.int64)
+        expected = np.diff(sample) * (1e9 / self.sample_rate)
+        return (np.diff(ns) - expected).astype(np.int64)
+
+    def report(self, rx_offset=0):
+        latency = self.latency_ns(rx_offset) / 1e3
+        summary = {"blocks": len(latency)}
+        if len(latency):
+            summary.update({
+                "latency_min_us": float(latency.min()),
+                "latency_p50_us": float(np.percentile(latency, 50)),
+                "latency_p99_us": float(np.percentile(latency, 99)),
+                "latency_max_us": float(latency.max()),
+            })
+        for direction in ("tx", "rx"):
+            jitter = self.jitter_ns(direction) / 1e3
+            if len(jitter):
+                summary[f"{direction}_jitter_std_us"] = float(jitter.std())
+                summary[f"{direction}_jitter_p99_us"] = float(np.percentile(np.abs(jitter), 99))
+        return summary
+
+
+def histogram(values_ns, bins=20, range_us=None):
+    """Histogram of nanosecond values in microsecond bins: (counts, edges_us)."""
+    return np.histogram(np.asarray(values_ns) / 1e3, bins=bins, range=range_us)
+
+
+def format_histogram(counts, edges, width=40, unit="us"):
+    peak = max(int(counts.max()), 1) if len(counts) else 1
+    lines = []
+    for count, low, high in zip(counts, edges[:-1], edges[1:]):
+        bar = "#" * int(round(width * count / peak))
+        lines.append(f"{low:>10.1f} - {high:<10.1f}{unit} {count:>7} {bar}")
+    return "\n".join(lines)
@@ -1,5 +1,16 @@
-from flask import Flask, render_template, jsonify, request
-from shared.controls import get_counter, set_counter, increase_counter
+import os
+from flask import Flask, Response, render_template, jsonify, request
+from shared.controls import (ParameterError, VersionConflict, get_counter, get_epoch, get_state,
+                             increase_counter, set_counter, update_parameters)
+from shared.fragment_cache import cached_fragment
+from shared.spectrum import get_engine, get_spectrum_data, get_spectrum_json, start_spectrum_engine
+from shared.spectrum_stream import clamp_fps, spectrum_stream, streams
+
+# Live IQ stream the spectrum engine listens to (see UDP Test/sendUDP.py); its
+# sample rate in Hz labels the frequency axis, which is normalized without it
+SPECTRUM_UDP_IP = "127.0.0.1"
+SPECTRUM_UDP_PORT = 8080
+SPECTRUM_SAMPLE_RATE = float(os.environ['SPECTRUM_SAMPLE_RATE']) if os.environ.get('SPECTRUM_SAMPLE_RATE') else None
 
 app = Flask(__name__)
 
@@ -9,20 +20,83 @@ def index():
 
 @app.route('/controls')
 def controls():
-    counter = get_counter()
-    return render_template('controls.html', counter=counter)
+    # Re-rendered only when the control state version changes
+    state = get_state()
+    return cached_fragment('controls', state.version,
+                           lambda: render_template('controls.html', counter=state.values['counter'],
+                                                   parameters=state.values, version=state.version),
+                           epoch=get_epoch())
 
 @app.route('/increase', methods=['POST'])
 def increase():
-    increase_counter()
-    return jsonify({'counter': get_counter()})
+    state = increase_counter()
+    return jsonify({'counter': state.values['counter']})
 
 @app.route('/set_counter', methods=['POST'])
 def set_new_counter():
-    new_counter = request.json.get('counter', None)
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return jsonify({'errors': {'counter': 'expected a JSON object body'}}), 400
+    new_counter = body.get('counter', None)
     if new_counter is not None:
-        set_counter(new_counter)
+        try:
+            return jsonify({'counter': set_counter(new_counter).values['counter']})
+        except ParameterError as e:
+            return jsonify({'errors': e.errors}), 400
     return jsonify({'counter': get_counter()})
 
+def state_json(state):
+    return {'version': state.version, 'parameters': dict(state.values)}
+
+@app.route('/parameters', methods=['GET'])
+def get_parameters():
+    return jsonify(state_json(get_state()))
+
+@app.route('/parameters', methods=['POST'])
+def set_parameters():
+    # Validate and apply a whole parameter set at once; nothing changes if any value is rejected
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict) or not body.get('parameters'):
+        return jsonify({'errors': {'parameters': 'expected a JSON body with a non-empty "parameters" object'}}), 400
+    try:
+        state = update_parameters(body['parameters'], body.get('version'))
+    except ParameterError as e:
+        return jsonify({'errors': e.errors}), 400
+    except VersionConflict as e:
+        return jsonify({'error': 'version conflict', **state_json(e.state)}), 409
+    return jsonify(state_json(state))
+
+@app.route('/spectrum')
+def spectrum():
+    engine = get_engine()
+    return cached_fragment('spectrum', engine.version,
+                           lambda: render_template('spectrum.html', spectrum_data=get_spectrum_data()),
+                           epoch=engine.epoch)
+
+@app.route('/spectrum/latest')
+def spectrum_latest():
+    # Pre-serialized by the engine once per new row; no FFT work happens here
+    version, payload = get_spectrum_json()
+    if payload is None:
+        return Response(status=204)
+    return cached_fragment('spectrum-latest', version, lambda: payload, 'application/json', get_engine().epoch)
+
+@app.route('/spectrum/stream')
+def spectrum_stream_route():
+    # Binary push stream; each client gets the newest row at most `fps` times a second
+    encoding = request.args.get('encoding', 'uint8')
+    try:
+        fps = clamp_fps(request.args.get('fps', 10, type=float))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    stream = streams.open(spectrum_stream(get_engine(), encoding, fps))
+    if stream is None:
+        # Every stream holds a server thread; refuse rather than starve the control routes
+        return jsonify({'error': 'too many spectrum viewers'}), 503, {'Retry-After': '5'}
+    return Response(stream,
+                    mimetype='application/octet-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 if __name__ == '__main__':
-    app.run(debug=True)
+    start_spectrum_engine(SPECTRUM_UDP_IP, SPECTRUM_UDP_PORT, SPECTRUM_SAMPLE_RATE)
+    app.run(debug=True, use_reloader=False)
@@ -0,0 +1,132 @@
+import argparse
+import http.client
+import json
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
+
+# Load-test harness for the control routes. Each simulated client keeps one
+# HTTP/1.1 connection open and issues requests back to back for a fixed time;
+# the run is repeated at increasing concurrency. With --viewers, that many
+# /spectrum/stream connections are held open for the whole test, to check
+# that viewers beyond the server's stream limit get a 503 and the control
+# routes stay responsive.
+#
+#   python loadtest.py --url http://127.0.0.1:5000 --concurrency 1 4 16 64
+#   python loadtest.py --viewers 16 --endpoints /controls
+
+ENDPOINTS = {
+    "/controls": ("GET", None),
+    "/increase": ("POST", b""),
+    "/set_counter": ("POST", json.dumps({"counter": 0}).encode()),
+}
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return float("nan")
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_client(host, port, path, method, body, deadline, latencies, errors):
+    headers = {"Content-Type": "application/json"} if body is not None else {}
+    connection = http.client.HTTPConnection(host, port, timeout=10)
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors.append(response.status)
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(type(e).__name__)
+            connection.close()
+            connection = http.client.HTTPConnection(host, port, timeout=10)
+            continue
+        latencies.append(time.perf_counter() - start)
+    connection.close()
+
+
+def run_viewer(host, port, stop, statuses):
+    # Hold one spectrum stream open, reading whatever arrives, until told to stop
+    connection = http.client.HTTPConnection(host, port, timeout=10)
+    try:
+        connection.request("GET", "/spectrum/stream?fps=10")
+        response = connection.getresponse()
+        statuses.append(response.status)
+        if response.status == 200:
+            connection.sock.settimeout(0.2)
+            while not stop.is_set():
+                try:
+                    if not response.read1(65536):
+                        break
+                except socket.timeout:
+                    continue
+    except (OSError, http.client.HTTPException) as e:
+        statuses.append(type(e).__name__)
+    finally:
+        connection.close()
+
+
+def run_level(host, port, path, concurrency, duration):
+    method, body = ENDPOINTS[path]
+    per_client = [[] for _ in range(concurrency)]
+    errors = []
+    deadline = time.perf_counter() + duration
+    threads = [threading.Thread(target=run_client, args=(host, port, path, method, body, deadline, lat, errors))
+               for lat in per_client]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(x for client in per_client for x in client)
+    return {
+        "endpoint": path,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1e3,
+        "p99_ms": percentile(latencies, 0.99) * 1e3,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure latency and throughput of the control routes.")
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--endpoints", nargs="+", default=list(ENDPOINTS), choices=list(ENDPOINTS))
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per endpoint and level")
+    parser.add_argument("--viewers", type=int, default=0, help="spectrum streams held open during the test")
+    args = parser.parse_args()
+
+    url = urlsplit(args.url)
+    stop = threading.Event()
+    statuses = []
+    viewers = [threading.Thread(target=run_viewer, args=(url.hostname, url.port or 80, stop, statuses), daemon=True)
+               for _ in range(args.viewers)]
+    for t in viewers:
+        t.start()
+    while len(statuses) < args.viewers and any(t.is_alive() for t in viewers):
+        time.sleep(0.05)
+    if args.viewers:
+        admitted = statuses.count(200)
+        refused = statuses.count(503)
+        print(f"{args.viewers} stream viewers: {admitted} admitted, {refused} refused with 503, "
+              f"{args.viewers - admitted - refused} failed")
+
+    print(f"{'endpoint':<14}{'clients':>8}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>9}{'p99 ms':>9}")
+    for path in args.endpoints:
+        for concurrency in args.concurrency:
+            r = run_level(url.hostname, url.port or 80, path, concurrency, args.duration)
+            print(f"{r['endpoint']:<14}{r['concurrency']:>8}{r['requests']:>10}{r['errors']:>8}"
+                  f"{r['rps']:>10.0f}{r['p50_ms']:>9.2f}{r['p99_ms']:>9.2f}")
+    stop.set()
+    for t in viewers:
+        t.join()
@@ -0,0 +1,101 @@
+import argparse
+import importlib.util
+import os
+import sys
+
+# Production entry point for the routes in home-component.py.
+#
+#   python serve.py --server gunicorn --workers 4 --threads 8
+#   python serve.py --server waitress --threads 16      (Windows)
+#   python serve.py --server dev                        (Flask development server)
+#
+# The spectrum engine binds the live UDP stream, so it can only run in one
+# process: it is started in single-worker mode and skipped otherwise.
+#
+# Every /spectrum/stream viewer holds a thread for as long as it is
+# connected, so at most --max-streams viewers are admitted per worker (by
+# default all but RESERVED_THREADS of --threads) and the rest get a 503;
+# the reserved threads keep /controls and /parameters responsive.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RESERVED_THREADS = 4
+
+
+def load_home_component():
+    # home-component.py is not an importable module name, so load it by path
+    if HERE not in sys.path:
+        sys.path.insert(0, HERE)
+    spec = importlib.util.spec_from_file_location("home_component", os.path.join(HERE, "home-component.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def start_spectrum(module, args):
+    if args.no_spectrum:
+        return
+    if args.workers > 1:
+        print("Spectrum engine disabled: it needs the UDP port to itself and --workers is above 1.")
+        return
+    module.start_spectrum_engine(module.SPECTRUM_UDP_IP, module.SPECTRUM_UDP_PORT,
+                                 args.spectrum_fs or module.SPECTRUM_SAMPLE_RATE)
+
+
+def serve_gunicorn(module, args):
+    from gunicorn.app.base import BaseApplication
+
+    class Application(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{args.host}:{args.port}")
+            self.cfg.set("workers", args.workers)
+            # Threaded workers: handlers mostly wait on I/O and read lock-free state
+            self.cfg.set("worker_class", "gthread")
+            self.cfg.set("threads", args.threads)
+            self.cfg.set("keepalive", 5)
+            # Threads do not survive fork, so the engine starts inside the worker
+            self.cfg.set("post_worker_init", lambda worker: start_spectrum(module, args))
+
+        def load(self):
+            return module.app
+
+    Application().run()
+
+
+def serve_waitress(module, args):
+    from waitress import serve
+
+    start_spectrum(module, args)
+    serve(module.app, host=args.host, port=args.port, threads=args.threads)
+
+
+def serve_dev(module, args):
+    start_spectrum(module, args)
+    module.app.run(host=args.host, port=args.port, debug=True, use_reloader=False, threaded=True)
+
+
+SERVERS = {"gunicorn": serve_gunicorn, "waitress": serve_waitress, "dev": serve_dev}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the radar control web app.")
+    parser.add_argument("--server", choices=sorted(SERVERS), default="waitress" if os.name == "nt" else "gunicorn")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_WORKERS", "1")),
+                        help="worker processes (gunicorn only)")
+    parser.add_argument("--threads", type=int, default=16, help="threads per worker")
+    parser.add_argument("--max-streams", type=int, default=None,
+                        help=f"spectrum stream viewers per worker (default: threads - {RESERVED_THREADS})")
+    parser.add_argument("--no-spectrum", action="store_true", help="do not start the live spectrum engine")
+    parser.add_argument("--spectrum-fs", type=float, default=None,
+                        help="sample rate of the IQ stream in Hz (default $SPECTRUM_SAMPLE_RATE; "
+                             "without it the frequency axis is normalized)")
+    args = parser.parse_args()
+
+    if args.server != "gunicorn":
+        args.workers = 1
+    if args.max_streams is None:
+        args.max_streams = max(1, args.threads - RESERVED_THREADS)
+    module = load_home_component()
+    module.streams.limit = args.max_streams
+    SERVERS[args.server](module, args)
@@ -0,0 +1,278 @@
+import atexit
+import json
+import mmap
+import os
+import platform
+import struct
+import tempfile
+import threading
+import zlib
+from collections import namedtuple
+from contextlib import contextmanager
+from types import MappingProxyType
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process file locks, fall back to the local store
+    fcntl = None
+
+# Versioned control state shared by every request handler (and, with the mmap
+# backend, by every worker process). Readers get an immutable Snapshot and
+# never take a lock; writers serialize among themselves and publish a whole
+# new snapshot at once, so a reader sees either the old state or the new one.
+
+Snapshot = namedtuple("Snapshot", "version values")
+
+# The lock-free read of the shared store needs stores to become visible in
+# program order, which only x86's total store order guarantees; elsewhere
+# readers take the writers' lock instead (see spsc_buffer.py)
+TSO_MACHINES = {"x86_64", "amd64", "i386", "i486", "i586", "i686", "x86"}
+
+
+def _freeze(version, values):
+    return Snapshot(version, MappingProxyType(dict(values)))
+
+
+class LocalControlStore:
+    """Control state for a single process: copy-on-write snapshots behind one reference.
+
+    Versions restart at 0 with every new store; ``epoch`` tells stores apart
+    so a version number is never mistaken for one from an earlier store.
+    """
+
+    def __init__(self, defaults):
+        self.epoch = os.urandom(8).hex()
+        self._write_lock = threading.Lock()
+        self._snapshot = _freeze(0, defaults)
+
+    def snapshot(self):
+        return self._snapshot
+
+    def get(self, key, default=None):
+        return self._snapshot.values.get(key, default)
+
+    def update(self, func):
+        """Atomically merge ``func(current snapshot)`` into the values; returns the new snapshot."""
+        with self._write_lock:
+            current = self._snapshot
+            values = dict(current.values)
+            values.update(func(current))
+            self._snapshot = _freeze(current.version + 1, values)
+            return self._snapshot
+
+    def set(self, **values):
+        return self.update(lambda current: values)
+
+    def reset(self, defaults):
+        with self._write_lock:
+            self._snapshot = _freeze(self._snapshot.version + 1, defaults)
+            return self._snapshot
+
+
+class SharedControlStore(LocalControlStore):
+    """Control state in a memory-mapped file shared by every worker process.
+
+    The file holds two JSON records and a seqlock-protected header naming
+    the current one. Writers take an exclusive ``flock`` on the file (plus a
+    thread lock), write the new record into the other slot, then flip the
+    header while its sequence number is odd. Readers copy the current record
+    without locking and retry if the sequence number changed underneath
+    them; an unchanged sequence number returns the cached snapshot with no
+    copy or parse at all.
+
+    A writer that dies mid-flip leaves the sequence odd. Readers only spin
+    for a bounded number of attempts before taking the file lock, which the
+    kernel has released for the dead writer, and repairing the header from
+    the newest record whose checksum is intact.
+
+    The lock-free read relies on x86 store ordering; on other CPUs every
+    read takes the writers' lock instead.
+
+    Without ``path`` the store lives in a private file removed when the
+    creating process exits, so a new server starts from ``defaults``; give
+    a ``path`` to keep state across restarts.
+    """
+
+    HEADER = struct.Struct("<4sQI")     # magic, sequence, current slot
+    EPOCH = slice(16, 24)               # random id of the file's contents, set when it is initialized
+    HEADER_SIZE = 32
+    RECORD = struct.Struct("<QII")      # version, payload length, payload crc32
+    MAGIC = b"CTR2"
+    SPIN_LIMIT = 10000
+
+    def __init__(self, defaults, path=None, size=1 << 16):
+        self.persistent = path is not None
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="sar_control_", dir=shared_memory_dir())
+            os.close(fd)
+            atexit.register(self._remove, os.getpid())
+        self.path = path
+        self.size = size
+        self.slot_size = (size - self.HEADER_SIZE) // 2
+        self._defaults = dict(defaults)
+        self._write_lock = threading.Lock()
+        self._cache = (None, None)  # (sequence, snapshot), replaced as one reference
+        self._lock_reads = platform.machine().lower() not in TSO_MACHINES
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        # flock belongs to the open file, which a forked worker would share
+        # with its parent; give each child its own so the lock excludes it
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reopen)
+        with self._file_lock():
+            if os.fstat(self._fd).st_size < size:
+                os.ftruncate(self._fd, size)
+            self._map = mmap.mmap(self._fd, size)
+            magic = self.HEADER.unpack_from(self._map, 0)[0]
+            if magic != self.MAGIC or not any(self._map[self.EPOCH]):
+                self._map[self.EPOCH] = os.urandom(8)
+            self.epoch = self._map[self.EPOCH].hex()
+            if magic != self.MAGIC:
+                self._write(0, defaults)
+            else:
+                # State written by an older version may lack newer parameters
+                current = self._read(locked=True)
+                missing = {k: v for k, v in defaults.items() if k not in current.values}
+                if missing:
+                    self._write(current.version + 1, {**missing, **current.values})
+
+    def _remove(self, owner):
+        # Forked workers inherit atexit handlers; only the creator removes the file
+        if os.getpid() == owner:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+    def _reopen(self):
+        os.close(self._fd)
+        self._fd = os.open(self.path, os.O_RDWR)
+        self._write_lock = threading.Lock()
+
+    @contextmanager
+    def _file_lock(self):
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _slot_offset(self, slot):
+        return self.HEADER_SIZE + slot * self.slot_size
+
+    def _record(self, slot, verify=False):
+        # (version, payload bytes) of a slot; with verify, None unless the checksum matches
+        offset = self._slot_offset(slot)
+        version, length, crc = self.RECORD.unpack_from(self._map, offset)
+        if length > self.slot_size - self.RECORD.size:
+            return None
+        start = offset + self.RECORD.size
+        payload = self._map[start:start + length]
+        if verify and zlib.crc32(payload) != crc:
+            return None
+        return version, payload
+
+    def _publish(self, sequence, slot):
+        struct.pack_into("<4sQ", self._map, 0, self.MAGIC, sequence)              # odd: flip in progress
+        self.HEADER.pack_into(self._map, 0, self.MAGIC, sequence, slot)
+        struct.pack_into("<4sQ", self._map, 0, self.MAGIC, sequence + 1)          # even: published
+
+    def _write(self, version, values):
+        payload = json.dumps(values).encode()
+        if len(payload) > self.slot_size - self.RECORD.size:
+            raise ValueError("control state does not fit in the shared segment")
+        magic, sequence, current = self.HEADER.unpack_from(self._map, 0)
+        if magic != self.MAGIC:
+            sequence, current = 0, 1
+        # Readers only look at the current slot, so the other one is free to overwrite
+        slot = 1 - current
+        offset = self._slot_offset(slot)
+        self._map[offset + self.RECORD.size:offset + self.RECORD.size + len(payload)] = payload
+        self.RECORD.pack_into(self._map, offset, version, len(payload), zlib.crc32(payload))
+        self._publish(sequence + 1 if sequence % 2 == 0 else sequence + 2, slot)
+
+    def _repair(self, force=False):
+        # Called with the file lock held, so an odd sequence means its writer died
+        _, sequence, _ = self.HEADER.unpack_from(self._map, 0)
+        if sequence % 2 == 0 and not force:
+            return
+        sequence |= 1
+        records = [(record[0], slot) for slot, record in
+                   ((slot, self._record(slot, verify=True)) for slot in (0, 1)) if record is not None]
+        if records:
+            self._publish(sequence, max(records)[1])
+        else:
+            self._write(0, self._defaults)
+
+    def _read(self, locked=False):
+        for _ in range(self.SPIN_LIMIT):
+            _, sequence, slot = self.HEADER.unpack_from(self._map, 0)
+            if sequence % 2:
+                if locked:
+                    self._repair()
+                continue
+            cached_sequence, cached = self._cache
+            if sequence == cached_sequence:
+                return cached
+            record = self._record(slot)
+            if self.HEADER.unpack_from(self._map, 0)[1] != sequence:
+                continue
+            if record is None:
+                if locked:
+                    self._repair(force=True)  # stable but unreadable: fall back to the intact record
+                continue
+            snapshot = _freeze(record[0], json.loads(record[1]))
+            self._cache = (sequence, snapshot)
+            return snapshot
+        if locked:
+            raise RuntimeError(f"control state in {self.path} cannot be read")
+        # Still changing: wait for the writer (or repair after a dead one) under the lock
+        with self._write_lock, self._file_lock():
+            self._repair()
+            return self._read(locked=True)
+
+    def snapshot(self):
+        if self._lock_reads:
+            with self._write_lock, self._file_lock():
+                return self._read(locked=True)
+        return self._read()
+
+    def get(self, key, default=None):
+        return self.snapshot().values.get(key, default)
+
+    def update(self, func):
+        with self._write_lock, self._file_lock():
+            current = self._read(locked=True)
+            values = dict(current.values)
+            values.update(func(current))
+            self._write(current.version + 1, values)
+        return _freeze(current.version + 1, values)
+
+    def reset(self, defaults):
+        with self._write_lock, self._file_lock():
+            version = self._read(locked=True).version + 1
+            self._write(version, defaults)
+        return _freeze(version, defaults)
+
+
+def shared_memory_dir():
+    return "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+
+def open_store(defaults, backend=None, path=None):
+    """Open the control store chosen by ``backend`` or ``$CONTROL_STATE_BACKEND``.
+
+    ``"mmap"`` (the default where file locks exist) shares state between
+    the worker processes forked from this one. State starts from
+    ``defaults`` each time unless ``path`` or ``$CONTROL_STATE_PATH`` names
+    a file to keep it in, in which case it outlives the processes until that
+    file is removed. ``"local"`` keeps it in this process only.
+    """
+    backend = backend or os.environ.get("CONTROL_STATE_BACKEND") or ("mmap" if fcntl else "local")
+    if backend == "local":
+        return LocalControlStore(defaults)
+    if backend == "mmap":
+        if fcntl is None:
+            raise RuntimeError("the mmap control store needs POSIX file locks")
+        return SharedControlStore(defaults, path or os.environ.get("CONTROL_STATE_PATH") or None)
+    raise ValueError(f"unknown control state backend {backend!r}")
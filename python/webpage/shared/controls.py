@@ -1,13 +1,109 @@
-counter = 0
+import math
+from shared.control_state import open_store
+
+# Radar control parameters and their startup values (from MatLab/main.m and B200.m)
+DEFAULTS = {
+    'counter': 0,
+    'center_freq': 80e6,      # Hz
+    'gain': 35,               # dB
+    'chirp_duration': 1e-6,   # seconds
+    'prf': 1000.0,            # pulses per second
+}
+
+# name: (type, minimum, maximum); None means unbounded
+PARAMETERS = {
+    'counter': (int, None, None),
+    'center_freq': (float, 70e6, 6e9),   # B200 tuning range
+    'gain': (float, 0, 76),
+    'chirp_duration': (float, 1e-9, 1.0),
+    'prf': (float, 1.0, 1e6),
+}
+
+store = open_store(DEFAULTS)
+
+class ParameterError(ValueError):
+    def __init__(self, errors):
+        super().__init__(', '.join(f'{name}: {message}' for name, message in errors.items()))
+        self.errors = errors
+
+class VersionConflict(Exception):
+    def __init__(self, state):
+        super().__init__(f'control state is at version {state.version}')
+        self.state = state
+
+def get_state():
+    # Versioned, immutable snapshot of every parameter; never blocks
+    return store.snapshot()
+
+def get_epoch():
+    # Versions restart with a new store; the epoch tells the stores apart
+    return store.epoch
 
 def get_counter():
-    global counter
-    return counter
+    return store.get('counter')
 
 def set_counter(new_value):
-    global counter
-    counter = new_value
+    # Same coercion and checks as any other parameter update
+    return store.set(**validate_parameters({'counter': new_value}))
 
 def increase_counter():
-    global counter
-    counter += 1
+    # Read-modify-write as one atomic update, even across worker processes
+    return store.update(lambda current: {'counter': int(current.values['counter']) + 1})
+
+def validate_parameters(changes):
+    # Coerce and range-check every value; report all problems at once
+    if not isinstance(changes, dict):
+        raise ParameterError({'parameters': 'expected an object of name: value pairs'})
+    valid, errors = {}, {}
+    for name, value in changes.items():
+        if name not in PARAMETERS:
+            errors[name] = 'unknown parameter'
+            continue
+        kind, minimum, maximum = PARAMETERS[name]
+        try:
+            if isinstance(value, bool):
+                raise ValueError
+            value = kind(value)
+            if kind is float and not math.isfinite(value):
+                raise ValueError
+        except (TypeError, ValueError, OverflowError):
+            errors[name] = f'expected {kind.__name__}'
+            continue
+        if (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+            errors[name] = f'must be between {minimum:g} and {maximum:g}'
+            continue
+        valid[name] = value
+    if errors:
+        raise ParameterError(errors)
+    return valid
+
+def validate_version(version):
+    # Versions arrive as JSON numbers or strings; both must be whole and non-negative
+    try:
+        if isinstance(version, bool) or (isinstance(version, float) and not version.is_integer()):
+            raise ValueError
+        version = int(version)
+    except (TypeError, ValueError, OverflowError):
+        raise ParameterError({'version': 'expected a non-negative integer'})
+    if version < 0:
+        raise ParameterError({'version': 'expected a non-negative integer'})
+    return version
+
+def update_parameters(changes, expected_version=None):
+    """Validate a whole parameter set and apply it as one atomic update.
+
+    Nothing is applied if any value is invalid. With ``expected_version``, the
+    update only goes through if nobody else changed the state since that
+    version was read.
+    """
+    valid = validate_parameters(changes)
+    if expected_version is not None:
+        expected_version = validate_version(expected_version)
+
+    def apply(current):
+        # Checked against the state being updated, under the store's write lock
+        if expected_version is not None and current.version != expected_version:
+            raise VersionConflict(current)
+        return valid
+
+    return store.update(apply)
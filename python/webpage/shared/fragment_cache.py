@@ -0,0 +1,101 @@
+import gzip
+import threading
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Rendered fragments cached by (name, epoch, state version). A fragment is
+# rendered and compressed at most once per version; repeat requests are
+# answered from the cache, and clients that already hold the current version
+# get a 304. The epoch identifies the state's source (a store or engine
+# instance), whose versions restart at 0, so an ETag never matches content
+# from before a restart. Only ETags are used: a Last-Modified date with
+# one-second resolution cannot tell two versions within a second apart.
+
+MIN_COMPRESS_BYTES = 256
+
+
+class Fragment:
+    def __init__(self, name, version, body, mimetype, epoch=None):
+        self.version = (epoch, version)
+        self.body = body
+        self.mimetype = mimetype
+        # Weak ETag: the same for every content-encoding of this version
+        self.etag = f'W/"{name}-{epoch}-{version}"' if epoch else f'W/"{name}-{version}"'
+        self._encoded = {}
+
+    def encoded(self, encoding):
+        body = self._encoded.get(encoding)
+        if body is None:
+            if encoding == "br":
+                body = brotli.compress(self.body)
+            elif encoding == "gzip":
+                body = gzip.compress(self.body, compresslevel=6)
+            else:
+                body = self.body
+            self._encoded[encoding] = body
+        return body
+
+
+class FragmentCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fragments = {}  # name -> newest Fragment
+
+    def get(self, name, version, render, mimetype="text/html", epoch=None):
+        fragment = self._fragments.get(name)
+        if fragment is None or fragment.version != (epoch, version):
+            with self._lock:
+                fragment = self._fragments.get(name)
+                if fragment is None or fragment.version != (epoch, version):
+                    body = render()
+                    if isinstance(body, str):
+                        body = body.encode()
+                    fragment = Fragment(name, version, body, mimetype, epoch)
+                    self._fragments[name] = fragment
+        return fragment
+
+
+def _not_modified(fragment):
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is not None:
+        tags = {tag.strip() for tag in if_none_match.split(",")}
+        return "*" in tags or fragment.etag in tags or fragment.etag[2:] in tags
+    return False
+
+
+def _choose_encoding(size):
+    if size < MIN_COMPRESS_BYTES:
+        return "identity"
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return "identity"
+
+
+def fragment_response(fragment):
+    """Serve a cached fragment with validators, a 304 when the client is current, and compression."""
+    headers = {
+        "ETag": fragment.etag,
+        "Cache-Control": "no-cache",  # always revalidate; a 304 costs almost nothing
+        "Vary": "Accept-Encoding",
+    }
+    if _not_modified(fragment):
+        return Response(status=304, headers=headers)
+
+    encoding = _choose_encoding(len(fragment.body))
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(fragment.encoded(encoding), mimetype=fragment.mimetype, headers=headers)
+
+
+cache = FragmentCache()
+
+
+def cached_fragment(name, version, render, mimetype="text/html", epoch=None):
+    return fragment_response(cache.get(name, version, render, mimetype, epoch))
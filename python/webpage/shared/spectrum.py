@@ -1,4 +1,234 @@
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import numpy as np
+
+# The UDP receive tooling lives in "UDP Test" at the repository root, which
+# is not part of the Docker build context; it is only imported once the
+# engine is started, and the web app keeps serving (with an empty spectrum)
+# when it is missing
+UDP_TEST_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'UDP Test'))
+
+
+def _import_udp_tooling():
+    if UDP_TEST_DIR not in sys.path:
+        sys.path.append(UDP_TEST_DIR)
+    import dspCache
+    from iqReceiver import open_receiver
+    return dspCache, open_receiver
+
+
+class SpectrumEngine:
+    """Windowed, averaged FFTs of a live IQ stream with a fixed-size waterfall history.
+
+    Samples are pushed in blocks of any size; every ``fft_size`` samples form
+    one windowed frame, and every ``average`` frames are averaged into one
+    published spectrum row. Rows go into a ring of ``history`` rows. Readers
+    only ever see the last published snapshot, so serving a request costs no
+    FFT work no matter how many clients ask.
+
+    ``fs`` is the stream's sample rate in Hz; without it the frequency axis
+    is normalized (cycles per sample, ``freq_unit`` says which).
+    """
+
+    def __init__(self, fft_size=1024, average=8, history=256, fs=None, center_freq=0.0):
+        self.fft_size = fft_size
+        self.average = average
+        self.history = history
+        self.fs = fs
+        self.center_freq = center_freq
+
+        # Precomputed once: window, its power normalisation and the frequency axis
+        self.window = np.hanning(fft_size).astype(np.float32)
+        self._scale = np.float32(1.0 / np.sum(self.window ** 2))
+        self.freq_unit = "Hz" if fs else "cycles/sample"
+        self.freqs = np.fft.fftshift(np.fft.fftfreq(fft_size, 1 / fs if fs else 1.0))
+        if fs:
+            self.freqs += center_freq
+        self._fft = np.fft.fft  # replaced by the shared DSP cache once started
+
+        # Reused working buffers
+        self._pending = np.zeros(fft_size, dtype=np.complex64)
+        self._pending_count = 0
+        self._windowed = np.zeros((average, fft_size), dtype=np.complex64)
+        self._power = np.zeros((average, fft_size), dtype=np.float32)
+        self._accum = np.zeros(fft_size, dtype=np.float32)
+        self._accum_count = 0
+
+        self.waterfall = np.full((history, fft_size), -200.0, dtype=np.float32)
+        self.rows = 0       # rows published since start
+        self.frames = 0     # FFT frames computed since start
+        self.version = 0
+        self.epoch = os.urandom(8).hex()  # versions restart with every engine
+        self._latest = None
+        self._latest_json = (None, None)
+        self._lock = threading.Lock()  # guards the waterfall ring while it is copied
+        self._updated = threading.Condition()  # notified whenever a row is published
+
+        self._thread = None
+        self._stop = threading.Event()
+        self.receiver = None
+
+    def push(self, samples):
+        """Consume a block of complex64 samples, publishing a row for every ``average`` frames."""
+        samples = np.asarray(samples, dtype=np.complex64)
+        at = 0
+
+        # Top up a partially filled frame from the previous block first
+        if self._pending_count:
+            take = min(self.fft_size - self._pending_count, len(samples))
+            self._pending[self._pending_count:self._pending_count + take] = samples[:take]
+            self._pending_count += take
+            at = take
+            if self._pending_count == self.fft_size:
+                self._process(self._pending[np.newaxis])
+                self._pending_count = 0
+
+        # Whole frames straight from the block, as views, up to `average` per FFT call
+        whole = (len(samples) - at) // self.fft_size
+        frames = samples[at:at + whole * self.fft_size].reshape(whole, self.fft_size)
+        for i in range(0, whole, self.average):
+            self._process(frames[i:i + self.average])
+        at += whole * self.fft_size
+
+        leftover = len(samples) - at
+        if leftover:
+            self._pending[:leftover] = samples[at:]
+            self._pending_count = leftover
+
+    def _process(self, frames):
+        count = len(frames)
+        windowed = self._windowed[:count]
+        np.multiply(frames, self.window, out=windowed)
+        spectra = self._fft(windowed)
+        power = self._power[:count]
+        np.multiply(spectra.real, spectra.real, out=power)
+        power += spectra.imag * spectra.imag
+        self.frames += count
+
+        i = 0
+        while i < count:
+            take = min(self.average - self._accum_count, count - i)
+            self._accum += power[i:i + take].sum(axis=0)
+            self._accum_count += take
+            i += take
+            if self._accum_count == self.average:
+                self._publish()
+
+    def _publish(self):
+        mean = self._accum * (self._scale / self.average)
+        row = np.fft.fftshift(10 * np.log10(np.maximum(mean, 1e-20))).astype(np.float32)
+        self._accum[:] = 0
+        self._accum_count = 0
+
+        with self._lock:
+            self.waterfall[self.rows % self.history] = row
+            self.rows += 1
+        self.version += 1
+        # Replace the snapshot in one assignment; readers never see a partial row
+        self._latest = {"version": self.version, "time": time.time(), "power_db": row}
+        with self._updated:
+            self._updated.notify_all()
+
+    def wait_for_update(self, after_version, timeout=None):
+        """Block until a row newer than ``after_version`` is published; returns the latest snapshot."""
+        with self._updated:
+            self._updated.wait_for(lambda: self.version > after_version, timeout)
+        return self._latest
+
+    def latest(self):
+        return self._latest
+
+    def latest_json(self):
+        """``(version, JSON)`` for the newest row, serialized once per published version."""
+        version, payload = self._latest_json
+        latest = self._latest
+        if latest is None:
+            return None, None
+        if version != latest["version"]:
+            payload = json.dumps({
+                "version": latest["version"],
+                "time": latest["time"],
+                "center_freq": self.center_freq,
+                "fs": self.fs,
+                "freq_unit": self.freq_unit,
+                "power_db": np.round(latest["power_db"], 2).tolist(),
+            })
+            self._latest_json = (latest["version"], payload)
+        return latest["version"], payload
+
+    def waterfall_rows(self, count=None):
+        """Copy of the newest ``count`` waterfall rows, oldest first."""
+        with self._lock:
+            available = min(self.rows, self.history)
+            count = available if count is None else min(count, available)
+            order = np.arange(self.rows - count, self.rows) % self.history
+            return self.waterfall[order]
+
+    def start(self, udp_ip="127.0.0.1", udp_port=8080, packet_size=1472, framed=True):
+        """Receive the live UDP IQ stream on a background thread and feed it to the engine."""
+        dspCache, open_receiver = _import_udp_tooling()
+        self._fft = dspCache.fft
+        # Plan the FFT batch shapes before the first packet arrives
+        dspCache.prewarm(shapes=[(count, self.fft_size) for count in range(1, self.average + 1)])
+        self.receiver = open_receiver(udp_ip, udp_port, timeout=0.2, packet_size=packet_size, framed=framed)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="spectrum-engine", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        receiver = self.receiver
+        while not self._stop.is_set():
+            try:
+                receiver.poll()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            for part in receiver.peek():
+                self.push(part)
+            receiver.consume(receiver.available)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(1.0)
+        if self.receiver is not None:
+            self.receiver.sock.close()
+
+
+engine = SpectrumEngine()
+
+
+def start_spectrum_engine(udp_ip="127.0.0.1", udp_port=8080, fs=None, center_freq=0.0):
+    global engine
+    if engine.fs != fs or engine.center_freq != center_freq:
+        engine = SpectrumEngine(fs=fs, center_freq=center_freq)
+    try:
+        return engine.start(udp_ip, udp_port)
+    except ImportError as e:
+        # Without "UDP Test" (e.g. in the Docker image) the app keeps serving; the spectrum stays empty
+        print(f"Live spectrum disabled: the UDP receive tooling could not be imported ({e}).")
+        return None
+
+
+def get_engine():
+    return engine
+
+
+def get_spectrum_json():
+    return engine.latest_json()
+
+
 def get_spectrum_data():
-    # Example data. You can replace this with real spectrum data.
-    spectrum_string = "This is the spectrum data: [1.0, 2.3, 3.7, 4.5]"
-    return spectrum_string
\ No newline at end of file
+    # Latest averaged spectrum row; computed once per block, shared by every request
+    latest = engine.latest()
+    if latest is None:
+        return "No spectrum data yet."
+    peak = int(np.argmax(latest["power_db"]))
+    return (f"Spectrum #{latest['version']}: peak {latest['power_db'][peak]:.1f} dB "
+            f"at {engine.freqs[peak]:.{1 if engine.fs else 4}f} {engine.freq_unit}")
@@ -0,0 +1,173 @@
+import math
+import struct
+import threading
+import time
+import numpy as np
+
+# Binary push stream of spectrum rows for the browser.
+#
+# Each message is a 24-byte little-endian header followed by the payload:
+#   magic    4s   b"SPEC"
+#   kind     u8   KIND_ROW (one new row), KIND_HISTORY (waterfall, oldest row first)
+#                 or KIND_KEEPALIVE (header only)
+#   encoding u8   ENCODING_UINT8 (dB quantized between min_db and max_db) or ENCODING_FLOAT16
+#   rows     u16
+#   bins     u32
+#   version  u32  engine version of the newest row
+#   min_db   f32
+#   max_db   f32
+# Messages are encoded once per engine version and shared by every client.
+
+FRAME_HEADER = struct.Struct("<4sBBHIIff")
+MAGIC = b"SPEC"
+KIND_KEEPALIVE = 0
+KIND_ROW = 1
+KIND_HISTORY = 2
+ENCODING_UINT8 = 1
+ENCODING_FLOAT16 = 2
+ENCODINGS = {"uint8": ENCODING_UINT8, "float16": ENCODING_FLOAT16}
+
+MAX_FPS = 30          # upper bound on what any single client may request
+MAX_STREAMS = 12      # concurrent viewers per process unless the server sets its own limit
+KEEPALIVE_SECONDS = 5   # also bounds how long a departed viewer holds its thread while idle
+KEEPALIVE = FRAME_HEADER.pack(MAGIC, KIND_KEEPALIVE, 0, 0, 0, 0, 0.0, 0.0)
+
+
+def encode_rows(rows, kind, encoding, version):
+    rows = np.atleast_2d(rows)
+    min_db, max_db = float(rows.min()), float(rows.max())
+    if encoding == ENCODING_UINT8:
+        span = max(max_db - min_db, 1e-6)
+        payload = np.clip((rows - min_db) * (255 / span), 0, 255).astype(np.uint8)
+    else:
+        payload = rows.astype("<f2")
+    header = FRAME_HEADER.pack(MAGIC, kind, encoding, rows.shape[0], rows.shape[1], version, min_db, max_db)
+    return header + payload.tobytes()
+
+
+class FrameCache:
+    """Encoded rows keyed by (version, encoding), so N viewers cost one encode per row."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._lock = threading.Lock()
+        self._frames = {}
+
+    def row(self, snapshot, encoding):
+        key = (snapshot["version"], encoding)
+        frame = self._frames.get(key)
+        if frame is None:
+            frame = encode_rows(snapshot["power_db"], KIND_ROW, encoding, snapshot["version"])
+            with self._lock:
+                # Only the newest version is ever requested again
+                self._frames = {k: v for k, v in self._frames.items() if k[0] == snapshot["version"]}
+                self._frames[key] = frame
+        return frame
+
+
+_caches = {}
+
+
+def _cache_for(engine):
+    cache = _caches.get(id(engine))
+    if cache is None or cache.engine is not engine:
+        cache = _caches[id(engine)] = FrameCache(engine)
+    return cache
+
+
+class StreamLimit:
+    """Cap on concurrent streams, so viewers cannot take every server thread.
+
+    Each open stream holds a worker thread for as long as the client stays
+    connected; ``open`` refuses a stream (returns None) once ``limit`` are
+    open, leaving the remaining threads for the control routes.
+    """
+
+    def __init__(self, limit=MAX_STREAMS):
+        self.limit = limit
+        self.active = 0
+        self.refused = 0
+        self._lock = threading.Lock()
+
+    def open(self, messages):
+        with self._lock:
+            if self.active >= self.limit:
+                self.refused += 1
+                return None
+            self.active += 1
+        return LimitedStream(messages, self)
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
+
+
+class LimitedStream:
+    # WSGI calls close() when the response ends or the client goes away, even
+    # if the generator never started, so the slot is always given back
+    def __init__(self, messages, limit):
+        self._messages = messages
+        self._limit = limit
+        self._closed = False
+
+    def __iter__(self):
+        return iter(self._messages)
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._messages.close()
+            self._limit.release()
+
+
+streams = StreamLimit()
+
+
+def clamp_fps(fps):
+    """``fps`` bounded to 0.1..MAX_FPS; raises ValueError if it is not a finite number."""
+    if not math.isfinite(fps):
+        raise ValueError("fps must be a finite number")
+    return min(max(fps, 0.1), MAX_FPS)
+
+
+def spectrum_stream(engine, encoding="uint8", fps=10, history=True):
+    """Generator of binary messages for one client.
+
+    The client always receives the newest row and never a backlog: if it (or
+    its connection) is slower than the engine, intermediate rows are skipped.
+    Because the WSGI server writes each yielded message before resuming the
+    generator, a stalled socket simply pauses this client. ``fps`` caps the
+    rate per client, bounded by MAX_FPS.
+    """
+    code = ENCODINGS.get(encoding, ENCODING_UINT8)
+    interval = 1.0 / clamp_fps(fps)
+    cache = _cache_for(engine)
+    version = 0
+
+    rows = ()
+    if history:
+        # Read the version first: a row racing in is sent twice rather than lost
+        version = engine.version
+        rows = engine.waterfall_rows()
+    if len(rows):
+        yield encode_rows(rows, KIND_HISTORY, code, version)
+    else:
+        # The server sends the response headers with the first message; do not hold them back
+        yield KEEPALIVE
+
+    next_send = time.monotonic()
+    while True:
+        snapshot = engine.wait_for_update(version, timeout=KEEPALIVE_SECONDS)
+        if snapshot is None or snapshot["version"] <= version:
+            # Header-only keep-alive so proxies and dead connections are noticed
+            yield KEEPALIVE
+            continue
+
+        delay = next_send - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+            snapshot = engine.latest()  # take whatever is newest after the wait
+
+        version = snapshot["version"]
+        yield cache.row(snapshot, code)
+        next_send = max(next_send + interval, time.monotonic())